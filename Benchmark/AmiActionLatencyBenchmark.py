@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import statistics
+import sys
+import time
+
+from Simulator.AmiSimulator import AmiSimulator
+from Voice.SoftSwitchServer import SoftSwitchServer
+
+# Measures the round trip of control actions while the AMI simulator storms the event session with
+# call events, once with every action on the event session and once with dedicated action sessions.
+# Run from the repository root: python -m Benchmark.AmiActionLatencyBenchmark 20000 300
+
+
+async def _run(port: int, sessions: int, actions: int) -> [float]:
+    switch = SoftSwitchServer()
+    switch._server_config['host'] = '127.0.0.1'
+    switch._server_config['port'] = str(port)
+    switch._server_config['user'] = 'Jaguar'
+    switch._server_config['secret'] = 'Jaguar'
+    switch._action_sessions = sessions
+    # Unfiltered, every storm event reaches the event session
+    switch._event_mask = ''
+    switch._event_filter = []
+    switch.init_server()
+    await switch.connect()
+    while not switch._manager.authenticated or (switch._pool is not None and len(switch._pool._ready) < sessions):
+        await asyncio.sleep(0.05)
+    # Let the event stream build up before measuring
+    await asyncio.sleep(1)
+    latencies = []
+    for i in range(actions):
+        started = time.perf_counter()
+        await switch._send_action({'Action': 'Setvar', 'Variable': 'Benchmark', 'Value': i})
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.005)
+    switch._manager.close()
+    if switch._pool is not None:
+        switch._pool.close()
+    return latencies
+
+
+async def main(rate: int, actions: int):
+    logging.basicConfig(level=logging.ERROR)
+    simulator = AmiSimulator('Jaguar', 'Jaguar', [str(3001 + i) for i in range(100)])
+    port = await simulator.start('127.0.0.1', 0)
+    storm = asyncio.create_task(simulator.storm({'call': rate / 2, 'noise': rate / 2}))
+    for name, sessions in [('shared', 0), ('dedicated', 2)]:
+        latencies = sorted(await _run(port, sessions, actions))
+        print(f'{name:<10} {rate:6} events/s  {actions} Setvar  p50 {statistics.median(latencies) * 1000:7.2f}ms  '
+              f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.2f}ms  max {latencies[-1] * 1000:7.2f}ms')
+    storm.cancel()
+    simulator.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+                     int(sys.argv[2]) if len(sys.argv) > 2 else 300))
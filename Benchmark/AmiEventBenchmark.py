@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import sys
+import time
+
+from Voice.SoftSwitchServer import SoftSwitchServer
+
+# Feeds a synthetic AMI stream through the panoramisk protocol parser into SoftSwitchServer and
+# measures events/s and CPU time. The unfiltered stream is what Asterisk sends with 'Events: on',
+# the filtered one is what is left after the Filter actions of Asterisk.conf [Events].
+# Run from the repository root: python -m Benchmark.AmiEventBenchmark 2000
+
+# Events of one call between two stations, the RTCP reports repeat every few seconds of the call
+CALL_EVENTS = (['Newchannel', 'VarSet', 'VarSet', 'VarSet', 'Newexten', 'Newexten', 'VarSet', 'Newexten',
+                'DialBegin', 'Newchannel', 'VarSet', 'Newstate', 'DialState', 'Newstate', 'DialEnd', 'BridgeCreate',
+                'BridgeEnter', 'BridgeEnter', 'Newstate'] +
+               ['RTCPSent', 'RTCPReceived'] * 24 +
+               ['BridgeLeave', 'BridgeLeave', 'BridgeDestroy', 'SoftHangupRequest', 'HangupRequest', 'Hangup',
+                'Hangup', 'VarSet', 'Cdr', 'Cel'])
+
+
+def _event(name: str, call: int) -> str:
+    ext = 3001 + call % 100
+    return (f'Event: {name}\r\nPrivilege: call,all\r\nChannel: PJSIP/{ext}-{call:08x}\r\n'
+            f'ChannelState: 6\r\nChannelStateDesc: Up\r\nCallerIDNum: {ext}\r\nCallerIDName: {ext}\r\n'
+            f'ConnectedLineNum: 3999\r\nLanguage: en\r\nAccountCode: \r\nContext: OnHold-Call\r\n'
+            f'Exten: 1\r\nPriority: 1\r\nUniqueid: 1700000000.{call}\r\nLinkedid: 1700000000.{call}\r\n'
+            f'Cause: 16\r\nVariable: BRIDGEPEER\r\nValue: PJSIP/3999-{call:08x}\r\n\r\n')
+
+
+def make_stream(calls: int, names=None) -> [str]:
+    return [_event(name, call) for call in range(calls) for name in CALL_EVENTS if names is None or
+            any(name.startswith(n) for n in names)]
+
+
+async def _run(events: [str]) -> (int, float, float):
+    switch = SoftSwitchServer()
+    switch.init_server()
+    # Without coalescing every status event reaches the subscriber, the counts of both runs are comparable
+    switch._status_coalescer._window = 0
+    delivered = []
+
+    async def on_status(ext, status, chanel):
+        delivered.append(ext)
+
+    switch.on_extension_status_changed(on_status)
+    protocol = switch._manager.config['protocol_factory']()
+    protocol.connection_made(None)
+    protocol.factory = switch._manager
+    protocol.version = 'benchmark'
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for chunk in range(0, len(events), 50):
+        protocol.data_received(''.join(events[chunk:chunk + 50]).encode())
+        await asyncio.sleep(0)
+    while len(asyncio.all_tasks()) > 1:
+        await asyncio.sleep(0)
+    return len(delivered), time.perf_counter() - wall, time.process_time() - cpu
+
+
+async def main(calls: int):
+    logging.basicConfig(level=logging.WARNING)
+    switch = SoftSwitchServer()
+    for name, events in [('unfiltered', make_stream(calls)), ('filtered', make_stream(calls, switch._event_filter))]:
+        delivered, wall, cpu = await _run(events)
+        print(f'{name:<10} {len(events):7} events  {wall:7.3f}s wall  {cpu:7.3f}s cpu  '
+              f'{len(events) / wall:9.0f} events/s  status updates: {delivered}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import sys
+import time
+
+from asyncua.ua import VariantType
+
+from OpcServer.JaguarOpcUaServer import JaguarOpcUaServer
+
+# Compares the per variable address space construction (add + set_writable for every station
+# variable) with the batched add_folders/add_variables path used by OpcElementFactory.
+# Run from the repository root: python -m Benchmark.StartupBenchmark 1000 10000
+
+
+def _station_variables(name: str, identifier: int):
+    return [(identifier + 1, f'{name}-ST', 16, VariantType.Byte, True),
+            (identifier + 2, f'{name}-CALL', 0, VariantType.Boolean, True),
+            (identifier + 3, f'{name}-CONFIRM', 0, VariantType.Boolean, True),
+            (identifier + 4, f'{name}-TRANSFER', '', VariantType.String, True),
+            (identifier + 5, f'{name}-PICKUP', 0, VariantType.Boolean, True),
+            (identifier + 6, f'{name}-DES', 'Init', VariantType.String, True),
+            (identifier + 7, f'{name}-CallGroup', 0, VariantType.Boolean, True),
+            (identifier + 8, f'{name}-CallGroup-ST', 0, VariantType.Boolean, True)]
+
+
+async def _build_sequential(server: JaguarOpcUaServer, stations: int, base: int) -> float:
+    parent = await server.add_folder(f'TEL-Sequential-{stations}')
+    start = time.perf_counter()
+    for i in range(stations):
+        name = f'SEQ-{stations}-{i}'
+        main = await parent.add_folder(server.idx, name)
+        for (identifier, label, value, var_type, writable) in _station_variables(name, (base + i) * 10):
+            await server.add(identifier, main, label, value, var_type, writable)
+    return time.perf_counter() - start
+
+
+async def _build_bulk(server: JaguarOpcUaServer, stations: int, base: int) -> float:
+    parent = await server.add_folder(f'TEL-Bulk-{stations}')
+    start = time.perf_counter()
+    names = [f'BULK-{stations}-{i}' for i in range(stations)]
+    folders = await server.add_folders(parent, names)
+    for i, (name, main) in enumerate(zip(names, folders)):
+        await server.add_variables(main, _station_variables(name, (base + stations + i) * 10))
+    return time.perf_counter() - start
+
+
+async def main(sizes: [int]):
+    server = JaguarOpcUaServer()
+    await server.init_server()
+    base = 100000
+    for stations in sizes:
+        sequential = await _build_sequential(server, stations, base)
+        bulk = await _build_bulk(server, stations, base)
+        base += 2 * stations
+        print(f'{stations:>6} stations: sequential {sequential:8.3f}s  bulk {bulk:8.3f}s  '
+              f'speedup x{sequential / bulk:.1f}')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main([int(x) for x in sys.argv[1:]] or [1000, 10000]))
@@ -0,0 +1,62 @@
+import asyncio
+import random
+import sys
+import time
+
+from Core.KeyedLock import KeyedLock
+
+# Replays a burst of station status events through the two serialization schemes of
+# Jaguar._change_element_status: the old global Semaphore(2) and the per extension KeyedLock.
+# Every event does two awaited writes (station status and group status) of WRITE_DELAY seconds.
+# Run from the repository root: python -m Benchmark.StatusBurstBenchmark 1000 250
+
+WRITE_DELAY = 0.002
+
+
+async def _write():
+    await asyncio.sleep(WRITE_DELAY)
+
+
+async def _run_semaphore(events: [str]) -> (float, bool):
+    semaphore = asyncio.Semaphore(2)
+    applied = {}
+
+    async def change(ext: str, seq: int):
+        await semaphore.acquire()
+        await _write()
+        await _write()
+        applied.setdefault(ext, []).append(seq)
+        semaphore.release()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[change(ext, seq) for seq, ext in enumerate(events)])
+    return time.perf_counter() - start, all(x == sorted(x) for x in applied.values())
+
+
+async def _run_keyed_lock(events: [str]) -> (float, bool):
+    locks = KeyedLock()
+    applied = {}
+
+    async def change(ext: str, seq: int):
+        async with locks.lock(ext):
+            await _write()
+            await _write()
+            applied.setdefault(ext, []).append(seq)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[change(ext, seq) for seq, ext in enumerate(events)])
+    return time.perf_counter() - start, all(x == sorted(x) for x in applied.values())
+
+
+async def main(count: int, extensions: int):
+    random.seed(1)
+    events = [str(3000 + random.randrange(extensions)) for _ in range(count)]
+    for name, run in [('Semaphore(2)', _run_semaphore), ('KeyedLock', _run_keyed_lock)]:
+        elapsed, ordered = await run(events)
+        print(f'{name:<13} {count} events / {extensions} extensions: {elapsed:7.3f}s '
+              f'{count / elapsed:9.0f} events/s  per extension order kept: {ordered}')
+
+
+if __name__ == '__main__':
+    args = [int(x) for x in sys.argv[1:]]
+    asyncio.run(main(args[0] if len(args) > 0 else 1000, args[1] if len(args) > 1 else 250))
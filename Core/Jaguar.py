@@ -1,31 +1,35 @@
 import asyncio
 import logging
-from typing import Dict
+import time
+from typing import Dict, Optional
 
 from asyncua import ua, Node
 from asyncua.common import subscription
 from asyncua.ua import DataChangeNotification, VariantType
 
+from Core.KeyedLock import KeyedLock
 from Core.WebSocketServer import WebSocketServer
 from OpcServer.JaguarOpcUaServer import JaguarOpcUaServer
 from OpcuaBase.OpcElementFactory import OpcElementFactory
 from OpcuaBase.OpcUaCalling import OpcUaCalling
 from OpcuaBase.OpcUaElement import OpcUaElement
 from OpcuaBase.OpcUaElementGroupStatus import OpcUaElementGroupStatus
+from OpcuaBase.OpcUaElementRegistry import OpcUaElementRegistry
 from OpcuaBase.OpcUaPaging import OpcUaPaging
 from OpcuaBase.OpcUaParameter import OpcUaParameter
 from OpcuaBase.OpcUaPopup import OpcUaPopup
 from OpcuaBase.OpcUaPopupCmd import OpcUaPopupCmd
+from OpcuaBase.OpcUaRoute import OpcUaRoute, OpcUaRouteDomain
+from OpcuaBase.OpcUaStationStatusArray import OpcUaStationStatusArray
 from OpcuaBase.OpcUaSubcription import OpcUaSubscriptionHandler
 from Voice.ExtensionStatus import ExtensionStatus
 from Voice.SoftSwitchServer import SoftSwitchServer
 
 
-def get_element_name(label: str) -> [str, str]:
-    idx = label.rindex('-')
-    if idx < len(label):
-        return [label[0:idx], label[idx + 1:]]
-    return label
+# Seconds to wait for the initial values of all monitored items before the callbacks are bound anyway
+INITIAL_VALUES_TIMEOUT = 10
+# Seconds a pause waits for the automatic paging loop to stop its groups
+AUTOMATIC_PAUSE_TIMEOUT = 5
 
 
 class Jaguar:
@@ -37,31 +41,37 @@ class Jaguar:
         self._softSwitchServer = SoftSwitchServer()
         self._socketServer = WebSocketServer()
         self.elements: Dict[str, OpcUaElement]
+        self.element_registry: OpcUaElementRegistry
         self.elements_subscription: subscription
         self.elements_subscription_handler: OpcUaSubscriptionHandler
         self.parameters: Dict[str, OpcUaParameter]
         self.parameters_subscription: subscription
         self.parameters_subscription_handler: OpcUaSubscriptionHandler
-        self.semaphore = asyncio.Semaphore(2)
+        self.extension_locks = KeyedLock()
         self.paging: OpcUaPaging
         self.paging_subscription: subscription
         self.paging_subscription_handler: OpcUaSubscriptionHandler
         self.paging_zone_subscription: subscription
         self.paging_zone_subscription_handler: OpcUaSubscriptionHandler
         self.elements_status_group: OpcUaElementGroupStatus
+        self.station_status: OpcUaStationStatusArray
         self.calling: OpcUaCalling
         self.calling_subscription: subscription
         self.calling_subscription_handler: OpcUaSubscriptionHandler
+        self._call_group_task: Optional[asyncio.Task] = None
         self.popup: OpcUaPopup
         self.popup_subscription: subscription
         self.popup_subscription_handler: OpcUaSubscriptionHandler
         self.popup_cmd_subscription: subscription
         self.popup_cmd_subscription_handler: OpcUaSubscriptionHandler
+        self.routes: Dict[ua.NodeId, OpcUaRoute] = {}
 
     async def _init_elements(self):
         self._logger.info('create opcua elements')
         factory = OpcElementFactory(self._opcUaServer)
         self.elements = await factory.get_elements()
+        self.element_registry = OpcUaElementRegistry(self.elements)
+        self.station_status = await factory.get_station_status_array(self.elements)
         self._logger.info('opcua elements created')
         self._logger.info('create opcua parameters')
         self.parameters = await factory.get_parameters()
@@ -73,98 +83,135 @@ class Jaguar:
         self.elements_status_group = await factory.get_elements_status_group()
         self._logger.info('create opcua Popup elements')
         self.popup = await factory.get_popup()
+        self.routes = factory.get_routes()
+        self._logger.info('opcua routing table has %s nodes', len(self.routes))
 
     async def _create_subscriptions(self):
 
         self._logger.info('create event subscriptions ...')
-        self.elements_subscription_handler = OpcUaSubscriptionHandler()
+        self.elements_subscription_handler = self._opcUaServer.create_subscription_handler('Elements')
         self.elements_subscription = await self._opcUaServer \
             .create_data_subscription(self.elements_subscription_handler)
 
         self._logger.info('create Paging subscriptions ...')
-        self.paging_subscription_handler = OpcUaSubscriptionHandler()
+        self.paging_subscription_handler = self._opcUaServer.create_subscription_handler('Paging')
         self.paging_subscription = await self._opcUaServer \
             .create_data_subscription(self.paging_subscription_handler)
 
         self._logger.info('create Parameters subscriptions ...')
-        self.parameters_subscription_handler = OpcUaSubscriptionHandler()
+        self.parameters_subscription_handler = self._opcUaServer.create_subscription_handler('Parameters')
         self.parameters_subscription = await self._opcUaServer \
             .create_data_subscription(self.parameters_subscription_handler)
 
         self._logger.info('create paging zone subscriptions ...')
-        self.paging_zone_subscription_handler = OpcUaSubscriptionHandler()
+        self.paging_zone_subscription_handler = self._opcUaServer.create_subscription_handler('Zones')
         self.paging_zone_subscription = await self._opcUaServer \
             .create_data_subscription(self.paging_zone_subscription_handler)
 
         self._logger.info('Create Calling subscriptions ...')
-        self.calling_subscription_handler = OpcUaSubscriptionHandler()
+        self.calling_subscription_handler = self._opcUaServer.create_subscription_handler('Calling')
         self.calling_subscription = await self._opcUaServer.create_data_subscription(self.calling_subscription_handler)
 
         self._logger.info('Create Popup subscriptions ...')
-        self.popup_subscription_handler = OpcUaSubscriptionHandler()
+        self.popup_subscription_handler = self._opcUaServer.create_subscription_handler('Popup')
         self.popup_subscription = await self._opcUaServer.create_data_subscription(self.popup_subscription_handler)
-        self.popup_cmd_subscription_handler = OpcUaSubscriptionHandler()
+        self.popup_cmd_subscription_handler = self._opcUaServer.create_subscription_handler('PopupCmd')
         self.popup_cmd_subscription = await self._opcUaServer.create_data_subscription(
             self.popup_cmd_subscription_handler)
 
-    async def _init_subscription(self):
+    def _get_subscription_handlers(self) -> [OpcUaSubscriptionHandler]:
+        return [self.elements_subscription_handler,
+                self.paging_subscription_handler,
+                self.paging_zone_subscription_handler,
+                self.calling_subscription_handler,
+                self.parameters_subscription_handler,
+                self.popup_subscription_handler,
+                self.popup_cmd_subscription_handler]
 
-        for el in self.elements:
-            await self.elements_subscription.subscribe_data_change(self.elements[el].get_nodes())
-        self._logger.info('Wait to Subscription Completed')
-
-        await asyncio.sleep(2)
+    async def _init_subscription(self):
 
+        await self._init_elements_subscription()
         await self._init_paging_subscription()
-
-        await asyncio.sleep(2)
-
         await self._init_calling_subscription()
-
-        await asyncio.sleep(2)
-
         await self._init_parameters_subscription()
-
-        await asyncio.sleep(2)
-
         await self._init_popup_subscription()
 
-        await asyncio.sleep(2)
+        # Every monitored item reports its current value once after creation. These
+        # notifications must be consumed before the dispatch callbacks are bound,
+        # otherwise each startup value would be handled as an operator command.
+        self._logger.info('Wait to Subscription Completed')
+        try:
+            await asyncio.wait_for(asyncio.gather(*[h.wait_initial_values() for h in self._get_subscription_handlers()]),
+                                   INITIAL_VALUES_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._logger.warning('Initial values are not received after %ss, bind callbacks anyway',
+                                 INITIAL_VALUES_TIMEOUT)
 
         await self._bind_dispatch_callbacks()
 
+    async def _init_elements_subscription(self):
+
+        nodes = []
+        for el in self.elements:
+            nodes.extend(self.elements[el].get_nodes())
+        nodes.append(self.station_status.Command)
+        await self._opcUaServer.subscribe_data_change(self.elements_subscription, self.elements_subscription_handler,
+                                                      nodes)
+
     async def _init_paging_subscription(self):
 
-        await self.paging_subscription.subscribe_data_change(self.paging.get_nodes())
-        await self.paging_zone_subscription.subscribe_data_change(self.paging.get_zones())
+        await self._opcUaServer.subscribe_data_change(self.paging_subscription, self.paging_subscription_handler,
+                                                      self.paging.get_nodes())
+        await self._opcUaServer.subscribe_data_change(self.paging_zone_subscription,
+                                                      self.paging_zone_subscription_handler, self.paging.get_zones())
 
     async def _init_calling_subscription(self):
 
-        await self.calling_subscription.subscribe_data_change(self.calling.get_nodes())
+        await self._opcUaServer.subscribe_data_change(self.calling_subscription, self.calling_subscription_handler,
+                                                      self.calling.get_nodes())
 
     async def _init_parameters_subscription(self):
 
+        nodes = []
         for pr in self.parameters:
-            await self.parameters_subscription.subscribe_data_change(self.parameters[pr].Value)
+            nodes.append(self.parameters[pr].Value)
+        await self._opcUaServer.subscribe_data_change(self.parameters_subscription,
+                                                      self.parameters_subscription_handler, nodes)
 
     async def _init_popup_subscription(self):
 
+        nodes = []
         for cam in self.popup.IPCams:
-            await self.popup_subscription.subscribe_data_change(self.popup.IPCams[cam].get_nodes())
+            nodes.extend(self.popup.IPCams[cam].get_nodes())
+        await self._opcUaServer.subscribe_data_change(self.popup_subscription, self.popup_subscription_handler, nodes)
+        nodes = []
         for cmd in self.popup.Commands:
-            await self.popup_cmd_subscription.subscribe_data_change(self.popup.Commands[cmd].Node)
+            nodes.append(self.popup.Commands[cmd].Node)
+        await self._opcUaServer.subscribe_data_change(self.popup_cmd_subscription, self.popup_cmd_subscription_handler,
+                                                      nodes)
+
+    def _get_route(self, node: Node) -> OpcUaRoute:
+        route = self.routes.get(node.nodeid)
+        if route is None:
+            self._logger.warning('Data change for unknown node %s is ignored', node)
+        return route
 
     async def on_element_data_changed(self, node: Node, val, data: DataChangeNotification):
-        bname = await node.read_browse_name()
-        node_name = str(bname.Name)
-        [element, item] = get_element_name(node_name)
-        self._logger.info('Element %s  %s data is changed to %s', element, item, val)
-        await self._handle_element_change(element, item, node, val)
+        route = self._get_route(node)
+        if route is None:
+            return
+        if route.Domain == OpcUaRouteDomain.Command:
+            await self._handle_element_commands(node, val)
+            return
+        self._logger.info('Element %s  %s data is changed to %s', route.Element, route.Item, val)
+        await self._handle_element_change(route.Element, route.Item, node, val)
 
     async def on_paging_data_changed(self, node: Node, val, data: DataChangeNotification):
-        bname = await node.read_browse_name()
-        self._logger.info('Paging %s changed (value=%s)', bname.Name, val)
-        match bname.Name:
+        route = self._get_route(node)
+        if route is None:
+            return
+        self._logger.info('Paging %s changed (value=%s)', route.Element, val)
+        match route.Element:
             case 'Paging-Live':
                 await self._handle_paging_live(node, val)
             case 'Paging-Live-Test':
@@ -182,9 +229,11 @@ class Jaguar:
                 await self._handle_paging_automatic_Pause(node, val)
 
     async def on_calling_data_changed(self, node: Node, val, data: DataChangeNotification):
-        bname = await node.read_browse_name()
-        self._logger.info('Calling %s changed (value=%s)', bname.Name, val)
-        match bname.Name:
+        route = self._get_route(node)
+        if route is None:
+            return
+        self._logger.info('Calling %s changed (value=%s)', route.Element, val)
+        match route.Element:
             case 'Call-PreRecord-Message':
                 await self._handle_calling_change(val)
             case 'Call-PreRecord-Message-No':
@@ -195,30 +244,36 @@ class Jaguar:
                 await self._handle_calling_call_group_reset_changed(val)
 
     async def on_parameter_data_changed(self, node: Node, val, data: DataChangeNotification):
-        bname = await node.read_browse_name()
-        self._logger.info('Parameter %s changed to %s ', bname.Name, val)
-        await self._handle_parameter_change(bname.Name, node, val)
+        route = self._get_route(node)
+        if route is None:
+            return
+        self._logger.info('Parameter %s changed to %s ', route.Element, val)
+        await self._handle_parameter_change(route.Element, node, val)
 
     async def on_paging_zone_selection_changed(self, node: Node, val, data: DataChangeNotification):
-        bname = await node.read_browse_name()
-        name = bname.Name
+        route = self._get_route(node)
+        if route is None:
+            return
+        name = route.Element
         self._logger.info('Paging Zone %s changed to %s', name, val)
         if name in self.paging.Zones:
             zone = self.paging.Zones[name]
             zone.Active = val
-        self._logger.info('Zone %s Active is  %s', name, self.paging.Zones[name].Active)
+            self._logger.info('Zone %s Active is  %s', name, zone.Active)
 
     async def on_popup_request_received(self, node: Node, val, data: DataChangeNotification):
-        bname = await node.read_browse_name()
-        [tag, _] = get_element_name(str(bname.Name))
-        self._logger.info('Popup Request %s Received For %s', val, tag)
-        await self._handle_popup_request(tag, node, val)
+        route = self._get_route(node)
+        if route is None:
+            return
+        self._logger.info('Popup Request %s Received For %s', val, route.Element)
+        await self._handle_popup_request(route.Element, node, val)
 
     async def on_popup_cmd_request_received(self, node: Node, val, data: DataChangeNotification):
-        bname = await node.read_browse_name()
-        cmd = (str(bname.Name))
-        self._logger.info('Popup Command %s Changed Received Value: %s', cmd, val)
-        await self._handle_popup_command(cmd, node, val)
+        route = self._get_route(node)
+        if route is None:
+            return
+        self._logger.info('Popup Command %s Changed Received Value: %s', route.Element, val)
+        await self._handle_popup_command(route.Element, node, val)
 
     async def _bind_dispatch_callbacks(self):
         self._logger.info('Bind Subscription Callback Methods')
@@ -230,16 +285,22 @@ class Jaguar:
         self.popup_subscription_handler.on_data_changed(self.on_popup_request_received)
         self.popup_cmd_subscription_handler.on_data_changed(self.on_popup_cmd_request_received)
 
+    def _startup_phase_finished(self, phase: str, started: float) -> float:
+        now = time.perf_counter()
+        self._logger.info('Startup phase "%s" finished in %.3fs', phase, now - started)
+        return now
+
     async def _init_opcua(self):
         self._logger.info('init OPCUA server...')
+        started = time.perf_counter()
         await self._opcUaServer.init_server()
+        started = self._startup_phase_finished('init server', started)
         await self._init_elements()
+        started = self._startup_phase_finished('create elements', started)
         await self._create_subscriptions()
-        self._logger.info('Wait For OPCUA server to Warmup')
-        for i in range(1, 5):
-            self._logger.info('progress %d ...', i * 20)
-            await asyncio.sleep(1)
+        started = self._startup_phase_finished('create subscriptions', started)
         await self._init_subscription()
+        self._startup_phase_finished('subscribe and receive initial values', started)
 
     async def _init_softswitch(self):
         self._logger.info('init soft switch connector...')
@@ -257,15 +318,15 @@ class Jaguar:
                 await self.elements_status_group.set_extension_status(ext, False)
 
     async def _change_element_status(self, ext, value, chanel):
-        await self.semaphore.acquire()
-        el = next((x for x in self.elements if self.elements[x].Extension == ext), None)
+        el = self.element_registry.get_by_extension(ext)
         if el is not None:
-            self._logger.info('change Element %s value to %s (Chanel ID: %s)' % (self.elements[el].Name, value,
-                                                                                 chanel))
-            await self.elements[el].Status.set_value(value, ua.VariantType.Byte)
-            await self._change_element_group_status(ext, value)
-            self.elements[el].chan = chanel
-        self.semaphore.release()
+            # Updates of one extension stay in order, other extensions are not blocked
+            async with self.extension_locks.lock(ext):
+                self._logger.info('change Element %s value to %s (Chanel ID: %s)', el.Name, value, chanel)
+                self._opcUaServer.write_value(el.Status, value, ua.VariantType.Byte)
+                self.station_status.set(el.Name, value)
+                await self._change_element_group_status(ext, value)
+                el.chan = chanel
         return False
 
     async def _change_paging_status(self, event: str, num: str, conference: str, channel: str):
@@ -280,14 +341,14 @@ class Jaguar:
                 self._logger.info('Paging Group %s Finished - Num:%s , Channel:%s', conference, num, channel)
                 if conference == '999':
                     self.paging.Paging_APP_General_Pager_Group = False
-                    await self.paging.Active_Channels.set_value(0, VariantType.Int16)
+                    self._opcUaServer.write_value(self.paging.Active_Channels, 0, VariantType.Int16)
                     await self.paging.update_status()
             case 'Join':
                 self._logger.info('%s Joined To Paging Group %s - Num:%s , ', channel, conference, num)
-                await self.paging.Active_Channels.set_value(int(num), VariantType.Int16)
+                self._opcUaServer.write_value(self.paging.Active_Channels, int(num), VariantType.Int16)
             case 'Leave':
                 self._logger.info('%s Leaved Paging Group %s - Num:%s', channel, conference, num)
-                await self.paging.Active_Channels.set_value(int(num), VariantType.Int16)
+                self._opcUaServer.write_value(self.paging.Active_Channels, int(num), VariantType.Int16)
                 if channel == 'Paging-autoapp':
                     self._logger.info('Application Channel %s Finished', channel)
                     asyncio.create_task(self.broadcast_automatic_broadcast_message(int(conference)))
@@ -310,34 +371,45 @@ class Jaguar:
 
     async def _handle_data_change_call(self, extension: str, node: Node):
         self._logger.info('Request for call origination to station %s', extension)
-        await self._softSwitchServer.originate(extension)
-        await node.set_value(False, VariantType.Boolean)
+        # The command is reset in any case, otherwise the operator's next request is no data change
+        try:
+            await self._softSwitchServer.originate(extension)
+        except asyncio.TimeoutError:
+            self._logger.error('Call origination to station %s timed out', extension)
+        finally:
+            self._opcUaServer.write_value(node, False, VariantType.Boolean)
 
     async def _handle_data_change_transfer(self, el: OpcUaElement, node: Node):
         self._logger.info('Request for call transfer from station %s', el.chan)
-        transfer = await el.Transfer.get_value()
+        transfer = self._opcUaServer.read_value(el.Transfer)
         self._logger.info('Transfer to station %s', transfer)
-        await self._softSwitchServer.redirect(el.chan, transfer)
-        await node.set_value(False, ua.VariantType.Boolean)
-
-    async def _handle_data_change_call_group(self, el: OpcUaElement, node: Node):
-        status = await node.get_value()
+        try:
+            await self._softSwitchServer.redirect(el.chan, transfer)
+        except asyncio.TimeoutError:
+            self._logger.error('Call transfer from station %s timed out', el.Name)
+        finally:
+            self._opcUaServer.write_value(node, False, ua.VariantType.Boolean)
+
+    async def _handle_data_change_call_group(self, el: OpcUaElement, node: Node, status: bool):
         self._logger.info('Change call group  for station %s is %s', el.Name, status)
-        await el.CallGroupStatus.set_value(status, VariantType.Boolean)
-        el.CallGroupSelected = status
+        self._opcUaServer.write_value(node, status, VariantType.Boolean)
+        self._opcUaServer.write_value(el.CallGroupStatus, status, VariantType.Boolean)
+        self.element_registry.set_call_group_selected(el, status)
 
-    async def _handle_data_change_call_pickup(self, el: OpcUaElement, node: Node):
-        status = await node.get_value()
+    async def _handle_data_change_call_pickup(self, el: OpcUaElement, node: Node, status: bool):
         self._logger.info('Pick UP station %s Call %s', el.Name, status)
         if status:
             mst = self._get_master_operator()
             self._logger.info('Get Master Operator ((%s))', mst)
-            await self._softSwitchServer.pickup(el.chan, mst)
-            await node.set_value(False, ua.VariantType.Boolean)
+            try:
+                await self._softSwitchServer.pickup(el.chan, mst)
+            except asyncio.TimeoutError:
+                self._logger.error('Call pickup of station %s timed out', el.Name)
+            finally:
+                self._opcUaServer.write_value(node, False, ua.VariantType.Boolean)
 
     async def _handle_element_change(self, name: str, item: str, node: Node, val):
         self._logger.info('Processing data changed event for %s element %s', name, item)
-        # await self.semaphore.acquire()
         if name in self.elements:
             self._logger.info('Element has found (%s)', name)
             match item:
@@ -352,11 +424,55 @@ class Jaguar:
                 case 'PICKUP':
                     if val:
                         self._logger.info('Try PICKUP Station %s CALL', name)
-                        await self._handle_data_change_call_pickup(self.elements[name], node)
+                        await self._handle_data_change_call_pickup(self.elements[name], node, val)
                 case 'CallGroup':
                     self._logger.info('Set CallGroup Station %s', name)
-                    await self._handle_data_change_call_group(self.elements[name], node)
-        # self.semaphore.release()
+                    await self._handle_data_change_call_group(self.elements[name], node, val)
+
+    def _get_element_command_node(self, el: OpcUaElement, item: str) -> Node:
+        match item:
+            case 'CALL':
+                return el.Call
+            case 'CONFIRM':
+                return el.Confirm
+            case 'PICKUP':
+                return el.PickUP
+            case 'CallGroup':
+                return el.CallGroup
+        return None
+
+    async def _handle_element_command_batch(self, name: str, commands: [(str, str)]):
+        el = self.elements[name]
+        for (item, arg) in commands:
+            node = self._get_element_command_node(el, item)
+            if item == 'CONFIRM' and arg:
+                # The argument of a transfer is its destination
+                self._opcUaServer.write_value(el.Transfer, arg, VariantType.String)
+                val = True
+            else:
+                val = arg.lower() not in ('0', 'false', 'off')
+            await self._handle_element_change(name, item, node, val)
+
+    async def _handle_element_commands(self, node: Node, val):
+        """
+        Stations-Command takes a list of "station,command,argument" entries. All entries of one write
+        are handled as one batch, commands of a station in their order and stations concurrently.
+        """
+        if not val:
+            return
+        batches: Dict[str, list] = {}
+        for entry in val:
+            sp = [x.strip() for x in str(entry).split(',', 2)]
+            name = sp[0]
+            item = sp[1] if len(sp) > 1 else ''
+            arg = sp[2] if len(sp) > 2 else ''
+            if name not in self.elements or self._get_element_command_node(self.elements[name], item) is None:
+                self._logger.warning('Element command "%s" is ignored', entry)
+                continue
+            batches.setdefault(name, []).append((item, arg))
+        self._logger.info('Processing %s element commands for %s stations', len(val), len(batches))
+        await asyncio.gather(*[self._handle_element_command_batch(name, batches[name]) for name in batches])
+        self._opcUaServer.write_value(node, [], VariantType.String)
 
     async def _handle_parameter_change(self, name: str, node: Node, val):
         self._logger.info('Process data for Parameter %s and value %s', name, val)
@@ -370,10 +486,10 @@ class Jaguar:
         await self.calling.set_announcement(val)
         if val:
             await self._softSwitchServer.setvar('Stations_Pre_Recorded_Message_ON', 'True')
-            await self.calling.Call_PreRecord_Message_Status.set_value(True, VariantType.Boolean)
+            self._opcUaServer.write_value(self.calling.Call_PreRecord_Message_Status, True, VariantType.Boolean)
         else:
             await self._softSwitchServer.setvar('Stations_Pre_Recorded_Message_ON', 'False')
-            await self.calling.Call_PreRecord_Message_Status.set_value(False, VariantType.Boolean)
+            self._opcUaServer.write_value(self.calling.Call_PreRecord_Message_Status, False, VariantType.Boolean)
 
     async def _handle_calling_message_change(self, ):
         self._logger.info('Calling announcement changed!')
@@ -381,13 +497,8 @@ class Jaguar:
         await self._softSwitchServer.setvar('Stations_Pre_Recorded_Message', self.calling.Call_APP_Message_FileName)
 
     def _get_active_call_group_extensions(self):
-        ext = []
-        names = []
-        for z in self.elements:
-            if self.elements[z].CallGroupSelected:
-                ext.append(self.elements[z])
-                names.append(self.elements[z].Name)
-        self._logger.info('Create selected extensions array : %s', names)
+        ext = self.element_registry.get_call_group_selected()
+        self._logger.info('Create selected extensions array : %s', [z.Name for z in ext])
         return ext
 
     async def _handle_calling_call_group_changed(self, val):
@@ -399,38 +510,49 @@ class Jaguar:
         if val:
             self._logger.info('Calling Call Group changed to %s', val)
             self._logger.info('selected extensions : %s', names)
-            await self._softSwitchServer.callGroup(names)
-            await self.calling.Call_CallGroup_Status.set_value(True, VariantType.Boolean)
+            if self._call_group_task is not None and not self._call_group_task.done():
+                self._logger.warning('Call group is still running, new request is ignored')
+                return
+            # Members are answered over tens of seconds, the Calling handler is not held up meanwhile
+            self._call_group_task = asyncio.create_task(self._call_group(names))
         else:
             self._logger.info('Calling Call Group changed to %s', val)
             self._logger.info('selected extensions : %s', names)
-            await self.calling.Call_CallGroup_Status.set_value(False, VariantType.Boolean)
+            self._opcUaServer.write_value(self.calling.Call_CallGroup_Status, False, VariantType.Boolean)
+
+    async def _call_group(self, names: [str]):
+        await self._softSwitchServer.callGroup(names, self.calling.set_call_group_progress)
+        # The request may have been switched off while the members were dialed
+        if self._opcUaServer.read_value(self.calling.Call_CallGroup_Calling):
+            self._opcUaServer.write_value(self.calling.Call_CallGroup_Status, True, VariantType.Boolean)
 
     async def _handle_calling_call_group_reset_changed(self, val):
         self._logger.info('Calling Call Group Reset!')
         ext = self._get_active_call_group_extensions()
         if val:
             self._logger.info('Calling Reset Call Group changed to %s', val)
-            await self.calling.Call_CallGroup_Reset.set_value(False, VariantType.Boolean)
+            self._opcUaServer.write_value(self.calling.Call_CallGroup_Reset, False, VariantType.Boolean)
             for z in ext:
-                z.CallGroupSelected = False
-                await z.CallGroup.set_value(False, VariantType.Boolean)
+                self.element_registry.set_call_group_selected(z, False)
+                self._opcUaServer.write_value(z.CallGroup, False, VariantType.Boolean)
                 self._logger.info('Calling Reset Ext: %s', z.Name)
 
     def _get_active_zones_extensions(self):
         ext = []
+        seen = set()
         for z in self.paging.Zones:
             if self.paging.Zones[z].Active:
                 for zs in self.paging.Zones[z].Elements:
-                    if zs in self.elements and zs not in ext:
+                    if zs in self.elements and zs not in seen:
+                        seen.add(zs)
                         ext.append(self.elements[zs].Extension)
         self._logger.info('Create selected extensions array : %s', ext)
         return ext
 
     def _get_master_operator(self):
-        for q in self.elements:
-            if self.elements[q].Zone == 'MST':
-                return self.elements[q].Extension
+        mst = self.element_registry.get_master()
+        if mst is not None:
+            return mst.Extension
         return None
 
     async def broadcast_manual_stop_other_modes(self):
@@ -455,7 +577,7 @@ class Jaguar:
             return
         self._logger.info('Master Extension is %s', mst)
         ext = self._get_active_zones_extensions()
-        await self._softSwitchServer.paging_activate_pager(ext, 999)
+        await self._softSwitchServer.paging_activate_pager(ext, 999, 'Live')
         await self._softSwitchServer.paging_active_master(mst, 999)
 
     async def broadcast_live_stop(self):
@@ -496,11 +618,11 @@ class Jaguar:
             self.paging.Paging_APP_Broadcast_Start_Request = True
             mst = self._get_master_operator()
             ext = self._get_active_zones_extensions()
-            await self._softSwitchServer.paging_activate_pager(ext, 999)
-            await self._softSwitchServer.paging_activate_pager([mst], 999)
+            await self._softSwitchServer.paging_activate_pager(ext + [mst] if mst is not None else ext, 999,
+                                                             'Manual')
             await self.broadcast_broadcast_message(True)
         else:
-            await self.paging.Broadcasting_Message.set_value(False, VariantType.Boolean)
+            self._opcUaServer.write_value(self.paging.Broadcasting_Message, False, VariantType.Boolean)
 
     async def broadcast_manual_stop(self):
         self._logger.info('Request for stopping message broadcasting... (Status=%s)',
@@ -516,7 +638,8 @@ class Jaguar:
     async def broadcast_semiauto_clearing(self):
         q = self.paging.Semiautomatic_Paging_Remain - 1
         self.paging.Semiautomatic_Paging_Remain = q
-        await self.paging.Semiautomatic_Paging_Repetition_Status.set_value(str(q), VariantType.String)
+        self._opcUaServer.write_value(self.paging.Semiautomatic_Paging_Repetition_Status, str(q),
+                                      VariantType.String)
         if self.paging.Semiautomatic_Paging_Keep_Alive and self.paging.Semiautomatic_Paging_Remain > 0:
             self._logger.info('SemiAuto broadcasting - Broadcast Message - No %s',
                               self.paging.Semiautomatic_Paging_Remain)
@@ -537,21 +660,22 @@ class Jaguar:
         if not self.paging.Paging_APP_Live_Status and not self.paging.Paging_APP_Broadcast_Status:
             await self.broadcast_manual_stop_other_modes()
             self.paging.Paging_APP_Semi_Automatic_Start_Request = True
-            c = await self.paging.Semiautomatic_Paging_No_Repetitions.get_value()
-            d = await self.paging.Semiautomatic_Paging_Delay.get_value()
+            c = self._opcUaServer.read_value(self.paging.Semiautomatic_Paging_No_Repetitions)
+            d = self._opcUaServer.read_value(self.paging.Semiautomatic_Paging_Delay)
             self.paging.Semiautomatic_Paging_Remain = c
             self.paging.Semiautomatic_Paging_Delay_Time = d
             self.paging.Semiautomatic_Paging_Keep_Alive = True
-            await self.paging.Semiautomatic_Paging_Repetition_Status.set_value(str(c), VariantType.String)
+            self._opcUaServer.write_value(self.paging.Semiautomatic_Paging_Repetition_Status, str(c),
+                                          VariantType.String)
             mst = self._get_master_operator()
             ext = self._get_active_zones_extensions()
-            await self._softSwitchServer.paging_activate_pager(ext, 999)
-            await self._softSwitchServer.paging_activate_pager([mst], 999)
+            await self._softSwitchServer.paging_activate_pager(ext + [mst] if mst is not None else ext, 999,
+                                                             'SemiAuto')
             filename = self.paging.Paging_APP_Broadcast_FileName
             self._logger.info('Start Semi Auto broadcasting message %s for %s times each %ss', filename, c, d)
             asyncio.create_task(self.broadcast_broadcast_message(False))
         else:
-            await self.paging.Semiautomatic_Paging.set_value(False, VariantType.Boolean)
+            self._opcUaServer.write_value(self.paging.Semiautomatic_Paging, False, VariantType.Boolean)
 
     async def broadcast_semiauto_stop(self):
         if self.paging.Paging_APP_Semi_Automatic_Status:
@@ -561,7 +685,7 @@ class Jaguar:
             await self._softSwitchServer.paging_deactivate_pager(999)
 
     async def broadcast_automatic_broadcast_message(self, grp: int):
-        if self.paging.Automatic_Paging_Keep_Alive and not self.paging.Automatic_Paging_Pause:
+        if self.paging.automatic_running():
             self._logger.info('Automatic broadcasting - Broadcast Message - Group %s', grp)
             msg = self.paging.Automatic_Paging_Messages[grp]
             self._logger.info('Message: %s - Filename: %s', msg.Title, msg.FileName)
@@ -573,7 +697,7 @@ class Jaguar:
         for c in self.paging.Automatic_Paging_Commands:
             g = await self.paging.Automatic_Paging_Commands[c].GetAutoMaticPagers()
             for p in g:
-                m = await g[p].Message.get_value()
+                m = self._opcUaServer.read_value(g[p].Message)
                 if m not in self.paging.Automatic_Paging_Active_Pagers:
                     self._logger.info('New Group :: CMD:%s , Ext:%s - Msg:%s', c, g[p].Extension, m)
                     self.paging.Automatic_Paging_Active_Pagers[m] = [g[p].Extension]
@@ -584,60 +708,75 @@ class Jaguar:
     async def broadcast_automatic_activate_group_pagers(self, grp, members):
         self._logger.info('Automatic broadcasting For %s', grp)
         self._logger.info('Automatic broadcasting Members %s', members)
-        await self._softSwitchServer.paging_activate_pager(members, grp)
-        asyncio.create_task(self.broadcast_automatic_broadcast_message(grp))
+        await self._softSwitchServer.paging_activate_pager(members, grp, 'Automatic')
+        await self.broadcast_automatic_broadcast_message(grp)
+
+    async def broadcast_automatic_run_groups(self):
+        activations = {}
+        for grp in self.paging.Automatic_Paging_Active_Pagers:
+            self._logger.info('Activating Group:%s - Pagers:%s', grp, self.paging.Automatic_Paging_Active_Pagers[grp])
+            activations[grp] = asyncio.create_task(
+                self.broadcast_automatic_activate_group_pagers(grp, self.paging.Automatic_Paging_Active_Pagers[grp]))
+        self._logger.info('Keep Alive Automatic paging')
+        await self.paging.wait_automatic_state(lambda: not self.paging.automatic_running())
+        # Pagers still waiting for their originate must not join a conference that is stopped below
+        for task in activations.values():
+            task.cancel()
+        await asyncio.gather(*activations.values(), return_exceptions=True)
+        for grp in activations:
+            self._logger.info('Stop Automatic broadcasting For %s', grp)
+            await self._softSwitchServer.paging_deactivate_pager(grp)
 
     async def broadcast_automatic(self):
         self._logger.info('Automatic broadcasting Activating')
-        grp_activated = {}
-        while self.paging.Automatic_Paging_Keep_Alive and not self.paging.Automatic_Paging_Pause:
-            self.paging.Paging_APP_Automatic_Start_Request = True
-            await self.paging.update_status()
-            if not self.paging.Paging_APP_Live_Status and not self.paging.Paging_APP_Broadcast_Status and \
-                    not self.paging.Paging_APP_Semi_Automatic_Status:
-                await self.broadcast_automatic_get_active()
-                for grp in self.paging.Automatic_Paging_Active_Pagers:
-                    self._logger.info(
-                        'Activating Group:%s - Pagers:%s', grp, self.paging.Automatic_Paging_Active_Pagers[grp])
-                    grp_activated[grp] = grp
-                    asyncio.create_task(
-                        self.broadcast_automatic_activate_group_pagers(
-                            grp, self.paging.Automatic_Paging_Active_Pagers[grp]))
-                while self.paging.Automatic_Paging_Keep_Alive and not self.paging.Automatic_Paging_Pause:
-                    self._logger.info('Keep Alive Automatic paging')
-                    await asyncio.sleep(2)
-                for g in grp_activated:
-                    self._logger.info('Stop Automatic broadcasting For %s', g)
-                    await self._softSwitchServer.paging_deactivate_pager(g)
-            else:
-                self.paging.Automatic_Paging_Pause = True
-            while self.paging.Automatic_Paging_Keep_Alive and self.paging.Automatic_Paging_Pause:
+        try:
+            while self.paging.automatic_running():
+                # Cleared before the first await, a pause from here on waits until the groups are stopped
+                self.paging.Automatic_Paging_Idle.clear()
+                self.paging.Paging_APP_Automatic_Start_Request = True
+                await self.paging.update_status()
+                if not self.paging.Paging_APP_Live_Status and not self.paging.Paging_APP_Broadcast_Status and \
+                        not self.paging.Paging_APP_Semi_Automatic_Status:
+                    await self.broadcast_automatic_get_active()
+                    # A pause or stop may have come in while the active pagers were read
+                    if self.paging.automatic_running():
+                        await self.broadcast_automatic_run_groups()
+                else:
+                    await self.paging.set_automatic_state(paused=True)
+                # The groups are stopped, a waiting pause can go on
+                self.paging.Automatic_Paging_Idle.set()
                 self._logger.info('Automatic paging - Pause')
-                await asyncio.sleep(2)
+                await self.paging.wait_automatic_state(
+                    lambda: not self.paging.Automatic_Paging_Keep_Alive or not self.paging.Automatic_Paging_Paused)
+        finally:
+            self.paging.Automatic_Paging_Idle.set()
         self.paging.Paging_APP_Automatic_Stop_Request = True
         await self.paging.update_status()
         self._logger.info('Automatic broadcasting Deactivated')
 
     async def broadcast_automatic_start(self):
         self._logger.info('Starting Automatic broadcasting...')
-        self.paging.Automatic_Paging_Pause = False
-        self.paging.Automatic_Paging_Keep_Alive = True
+        await self.paging.set_automatic_state(keep_alive=True, paused=False)
         self.paging.Automatic_Paging_Task = asyncio.create_task(self.broadcast_automatic())
 
     async def broadcast_automatic_stop(self):
         self._logger.info('Request for stopping message Automatic broadcasting...')
-        self.paging.Automatic_Paging_Keep_Alive = False
+        await self.paging.set_automatic_state(keep_alive=False)
         self._logger.info(f'Stop Automatic broadcasting Finished')
 
     async def broadcast_automatic_pause(self, val: bool):
         self._logger.info('Set Automatic Pause %s - Keep Alive:%s', val, self.paging.Automatic_Paging_Keep_Alive)
         if val and self.paging.Automatic_Paging_Keep_Alive:
             self._logger.info('Request for pausing Automatic broadcasting...')
-            self.paging.Automatic_Paging_Pause = True
-            await asyncio.sleep(2)
+            await self.paging.set_automatic_state(paused=True)
+            # Returns as soon as the automatic groups are stopped, the caller may page right after
+            try:
+                await asyncio.wait_for(self.paging.Automatic_Paging_Idle.wait(), AUTOMATIC_PAUSE_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._logger.warning('Automatic groups are not stopped after %ss', AUTOMATIC_PAUSE_TIMEOUT)
         elif self.paging.Automatic_Paging_Keep_Alive:
             self._logger.info('Request for resume Automatic broadcasting...')
-            self.paging.Automatic_Paging_Pause = False
+            await self.paging.set_automatic_state(paused=False)
         else:
             self._logger.info(f'Automatic broadcasting is not alive')
 
@@ -650,7 +789,7 @@ class Jaguar:
     async def _handle_paging_live_test(self, node: Node, val):
         self._logger.info('Request for Test Live paging...')
         await self._softSwitchServer.paging_get_active()
-        await node.set_value(False, VariantType.Boolean)
+        self._opcUaServer.write_value(node, False, VariantType.Boolean)
 
     async def _handle_paging_message_broadcasting(self, node: Node, val):
         if val:
@@ -682,7 +821,7 @@ class Jaguar:
             if tag in self.popup.IPCams.keys():
                 cam = self.popup.IPCams[tag]
                 await self._socketServer.broadcast('event', 'POP-UP', f'{tag},{cam.Nvr},{cam.Channel}')
-                await node.set_value(False, VariantType.Boolean)
+                self._opcUaServer.write_value(node, False, VariantType.Boolean)
 
     async def _handle_popup_command(self, command: str, node: Node, val):
         self._logger.info('Handling POP-UP Command %s!', command)
@@ -711,10 +850,17 @@ class Jaguar:
         if self.loop is None:
             self.loop = asyncio.get_event_loop()
         self.loop = asyncio.get_event_loop()
+        started = time.perf_counter()
         await self._init_opcua()
         await self._init_softswitch()
         self._start_services()
         await self._init_events()
+        serving = asyncio.create_task(self._opcUaServer.started.wait())
+        await asyncio.wait([serving, self._opcua_task], return_when=asyncio.FIRST_COMPLETED)
+        if serving.done():
+            self._logger.info('Jaguar is serving, startup took %.3fs', time.perf_counter() - started)
+        else:
+            serving.cancel()
         await self._soft_switch_task
         await self._opcua_task
         await self._socket_task
@@ -1,10 +1,15 @@
 import asyncio
 import configparser
+import itertools
 import logging
 
 from asyncua import ua, Server
 from asyncua.common import Node, subscription
+from asyncua.common.callback import CallbackType, ServerItemCallback
+from asyncua.common.ua_utils import value_to_datavalue
 
+from OpcServer.OpcUaValueCache import OpcUaValueCache
+from OpcServer.OpcUaWriteQueue import OpcUaWriteQueue
 from OpcuaBase.OpcUaSubcription import OpcUaSubscriptionHandler
 
 
@@ -16,6 +21,59 @@ def get_security_policies(config) -> []:
     return security_policy
 
 
+def _create_folder_item(parent: ua.NodeId, idx: int, name: str) -> ua.AddNodesItem:
+    item = ua.AddNodesItem()
+    item.RequestedNewNodeId = ua.NodeId(0, idx)
+    item.BrowseName = ua.QualifiedName(name, idx)
+    item.ParentNodeId = parent
+    item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.Organizes)
+    item.NodeClass = ua.NodeClass.Object
+    item.TypeDefinition = ua.NodeId(ua.ObjectIds.FolderType)
+    attrs = ua.ObjectAttributes()
+    attrs.EventNotifier = 0
+    attrs.Description = ua.LocalizedText(name)
+    attrs.DisplayName = ua.LocalizedText(name)
+    attrs.WriteMask = 0
+    attrs.UserWriteMask = 0
+    item.NodeAttributes = attrs
+    return item
+
+
+def _create_variable_item(parent: ua.NodeId, nodeid: ua.NodeId, name: str, value, var_type: ua.VariantType,
+                          writable: bool) -> ua.AddNodesItem:
+    # Same layout as asyncua's create_variable, but the access level is set up front
+    # so that a writable node does not need the extra set_writable round trips.
+    qname = ua.QualifiedName.from_string(name)
+    access = ua.AccessLevel.CurrentRead.mask
+    if writable:
+        access |= ua.AccessLevel.CurrentWrite.mask
+    item = ua.AddNodesItem()
+    item.RequestedNewNodeId = nodeid
+    item.BrowseName = qname
+    item.NodeClass = ua.NodeClass.Variable
+    item.ParentNodeId = parent
+    item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasComponent)
+    item.TypeDefinition = ua.NodeId(ua.ObjectIds.BaseDataVariableType)
+    attrs = ua.VariableAttributes()
+    attrs.Description = ua.LocalizedText(qname.Name)
+    attrs.DisplayName = ua.LocalizedText(qname.Name)
+    attrs.DataType = ua.NodeId(getattr(ua.ObjectIds, var_type.name))
+    attrs.Value = ua.Variant(value, var_type)
+    if isinstance(value, list):
+        attrs.ValueRank = ua.ValueRank.OneDimension
+        attrs.ArrayDimensions = [0]
+    else:
+        attrs.ValueRank = ua.ValueRank.Scalar
+        attrs.ArrayDimensions = None
+    attrs.WriteMask = 0
+    attrs.UserWriteMask = 0
+    attrs.Historizing = False
+    attrs.AccessLevel = access
+    attrs.UserAccessLevel = access
+    item.NodeAttributes = attrs
+    return item
+
+
 class JaguarOpcUaServer:
     _logger = logging.getLogger('Jaguar-OpcUaServer')
 
@@ -27,9 +85,19 @@ class JaguarOpcUaServer:
         self._config.optionxform = str
         self._config.read('Jaguar.conf')
         self._server = Server()
+        self._monitored_items_chunk_size = self._config.getint('Subscription', 'MonitoredItemsChunkSize',
+                                                               fallback=1000)
         self._alive = True
+        self.started = asyncio.Event()
         self.Subscription = None
         self._handler = None
+        self._handlers: [OpcUaSubscriptionHandler] = []
+        self._write_queue = OpcUaWriteQueue(self._write_values)
+        self._value_cache = OpcUaValueCache()
+        self._committing = None
+        # Client handles of monitored items, unique across all subscriptions
+        self._client_handles = itertools.count(1)
+        self._statistics_interval = self._config.getint('Statistics', 'Interval', fallback=60)
 
     async def init_server(self):
 
@@ -53,6 +121,7 @@ class JaguarOpcUaServer:
         # self._server.iserver.set_user_manager(user_manager)
 
         await self._server.init()
+        self._server.subscribe_server_callback(CallbackType.PostWrite, self._on_post_write)
 
         self._server.set_endpoint(server_config['endpoint'])
         self._idx = await self._server.register_namespace(server_config['uri'])
@@ -61,8 +130,19 @@ class JaguarOpcUaServer:
 
     async def start(self):
         async with self._server:
-            while self._alive:
-                await asyncio.sleep(1)
+            self._logger.info('Server is serving on %s', self._config['SERVER']['endpoint'])
+            self.started.set()
+            elapsed = 0
+            try:
+                while self._alive:
+                    await asyncio.sleep(1)
+                    elapsed += 1
+                    if self._statistics_interval > 0 and elapsed % self._statistics_interval == 0:
+                        self.log_statistics()
+            finally:
+                # The subscriptions end with the server, their handlers are stopped with them
+                for handler in self._handlers:
+                    handler.stop()
 
     def stop(self):
         self._alive = False
@@ -73,6 +153,7 @@ class JaguarOpcUaServer:
     async def add(self, identifier, node: Node, name, value, var_type: ua.VariantType, writable=True) -> Node:
         nodeid = ua.NodeId(identifier, self._idx)
         var = await node.add_variable(nodeid, name, value, var_type)
+        self._value_cache.set(nodeid, ua.Variant(value, var_type))
         if writable:
             await var.set_writable()
         return var
@@ -80,7 +161,154 @@ class JaguarOpcUaServer:
     async def add_folder(self, name) -> Node:
         return await self._server.nodes.objects.add_folder(self._idx, name)
 
+    async def _add_nodes(self, items: [ua.AddNodesItem]) -> [Node]:
+        results = await self._server.iserver.isession.add_nodes(items)
+        nodes = []
+        for result in results:
+            result.StatusCode.check()
+            nodes.append(self._server.get_node(result.AddedNodeId))
+        return nodes
+
+    async def add_folders(self, node: Node, names: [str]) -> [Node]:
+        """Create a sub folder of node for every name with a single AddNodes call."""
+        if not names:
+            return []
+        return await self._add_nodes([_create_folder_item(node.nodeid, self._idx, name) for name in names])
+
+    async def add_variables(self, node: Node, variables) -> [Node]:
+        """
+        Create all variables of a folder with a single AddNodes call.
+        variables is a list of (identifier, name, value, var_type, writable) tuples,
+        the created nodes are returned in the same order.
+        """
+        items = []
+        for (identifier, name, value, var_type, writable) in variables:
+            items.append(_create_variable_item(node.nodeid, ua.NodeId(identifier, self._idx), name, value, var_type,
+                                               writable))
+        nodes = await self._add_nodes(items)
+        for item in items:
+            self._value_cache.set(item.RequestedNewNodeId, item.NodeAttributes.Value)
+        return nodes
+
+    def write_value(self, node: Node, value, var_type: ua.VariantType):
+        """
+        Queue a value write of a server node. Queued values are written together on the next
+        loop tick, await flush() when the value has to be visible before going on.
+        Writing the value a node already holds is skipped, it would only notify every client again.
+        """
+        dv = value_to_datavalue(value, var_type)
+        if self._value_cache.changed(node.nodeid, dv.Value):
+            self._write_queue.put(node.nodeid, dv)
+
+    def read_value(self, node: Node):
+        """
+        Current value of a server node. Values are mirrored in memory from node creation on and
+        every write updates the mirror, so the address space is only read for unknown nodes.
+        """
+        value = self._value_cache.get(node.nodeid)
+        if value is None:
+            value = self._server.iserver.aspace.read_attribute_value(node.nodeid, ua.AttributeIds.Value).Value
+            self._value_cache.set(node.nodeid, value)
+        return value.Value
+
+    async def flush(self):
+        await self._write_queue.flush()
+
+    async def _write_values(self, values: [ua.WriteValue]) -> [ua.StatusCode]:
+        params = ua.WriteParameters()
+        params.NodesToWrite = values
+        # Commits of the write queue are serialized, there is at most one in flight
+        self._committing = params
+        try:
+            return await self._server.iserver.isession.write(params)
+        except Exception:
+            # The values were cached when queued but never reached the address space
+            for value in values:
+                self._value_cache.invalidate(value.NodeId)
+            raise
+        finally:
+            self._committing = None
+
+    def _on_post_write(self, event: ServerItemCallback, dispatcher):
+        # Values of the write queue are cached when queued, every other write is taken over here.
+        # A failed write leaves the node value unknown.
+        own = event.request_params is self._committing
+        for value, result in zip(event.request_params.NodesToWrite, event.response_params):
+            if value.AttributeId != ua.AttributeIds.Value:
+                continue
+            if not result.is_good():
+                self._value_cache.invalidate(value.NodeId)
+            elif not own:
+                self._value_cache.set(value.NodeId, value.Value.Value)
+
+    def write_statistics(self):
+        return self._write_queue.statistics()
+
+    def cache_statistics(self):
+        return self._value_cache.statistics()
+
+    def log_statistics(self):
+        self._logger.info('Value writes: %s', self.write_statistics())
+        self._logger.info('Value cache: %s', self.cache_statistics())
+        for handler in self._handlers:
+            self._logger.info('%s subscription handler: %s', handler.Name, handler.statistics())
+
+    def create_subscription_handler(self, name: str) -> OpcUaSubscriptionHandler:
+        handler = OpcUaSubscriptionHandler(name,
+                                           int(self._subscription_setting(name, 'Workers', 1.0)),
+                                           self._config.getint('Subscription', 'HandlerQueueSize', fallback=1000))
+        self._handlers.append(handler)
+        return handler
+
+    def settings(self, section: str) -> configparser.SectionProxy:
+        """A section of Jaguar.conf, an empty one when it is missing."""
+        if not self._config.has_section(section):
+            return self._config[self._config.default_section]
+        return self._config[section]
+
+    def _subscription_setting(self, name: str, key: str, default):
+        # [Subscription-<name>] overrides [Subscription], which overrides the built-in default
+        get = self._config.getboolean if isinstance(default, bool) else self._config.getfloat
+        try:
+            return get(f'Subscription-{name}', key, fallback=get('Subscription', key, fallback=default))
+        except ValueError as e:
+            self._logger.error('Invalid %s setting of the %s subscription, %s is used: %s', key, name, default, e)
+            return default
+
     async def create_data_subscription(self, handler: OpcUaSubscriptionHandler) -> subscription:
-        self._logger.info('Create Subscription Handler')
-        s = await self._server.create_subscription(500, handler)
-        return s
+        interval = self._subscription_setting(handler.Name, 'PublishingInterval', 500.0)
+        self._logger.info('Create %s Subscription with %sms publishing interval', handler.Name, interval)
+        return await self._server.create_subscription(interval, handler)
+
+    def _monitored_item_request(self, node: Node, sampling_interval: float, queue_size: int,
+                                discard_oldest: bool) -> ua.MonitoredItemCreateRequest:
+        item = ua.ReadValueId()
+        item.NodeId = node.nodeid
+        item.AttributeId = ua.AttributeIds.Value
+        params = ua.MonitoringParameters()
+        params.ClientHandle = next(self._client_handles)
+        params.SamplingInterval = sampling_interval
+        params.QueueSize = queue_size
+        params.DiscardOldest = discard_oldest
+        request = ua.MonitoredItemCreateRequest()
+        request.ItemToMonitor = item
+        request.MonitoringMode = ua.MonitoringMode.Reporting
+        request.RequestedParameters = params
+        return request
+
+    async def subscribe_data_change(self, sub: subscription, handler: OpcUaSubscriptionHandler, nodes: [Node]):
+        """Monitor all nodes of a subscription with as few CreateMonitoredItems calls as the chunk size allows."""
+        sampling_interval = self._subscription_setting(handler.Name, 'SamplingInterval', 0.0)
+        queue_size = int(self._subscription_setting(handler.Name, 'QueueSize', 0.0))
+        discard_oldest = self._subscription_setting(handler.Name, 'DiscardOldest', True)
+        handler.expect_initial_values(nodes)
+        size = max(self._monitored_items_chunk_size, 1)
+        for i in range(0, len(nodes), size):
+            chunk = nodes[i:i + size]
+            requests = [self._monitored_item_request(node, sampling_interval, queue_size, discard_oldest)
+                        for node in chunk]
+            results = await sub.create_monitored_items(requests)
+            for node, result in zip(chunk, results):
+                if isinstance(result, ua.StatusCode):
+                    self._logger.error('Monitoring node %s failed: %s', node, result)
+                    handler.drop_initial_value(node)
@@ -0,0 +1,41 @@
+from typing import Dict
+
+from asyncua import ua
+
+
+class OpcUaValueCache:
+    """
+    Last known value of server nodes, kept up to date by our own writes and by client writes.
+    A write of the value a node already holds is a hit and can be skipped.
+    """
+    Hits: int
+    Misses: int
+
+    def __init__(self):
+        self._values: Dict[ua.NodeId, ua.Variant] = {}
+        self.Hits = 0
+        self.Misses = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, nodeid: ua.NodeId) -> ua.Variant:
+        return self._values.get(nodeid)
+
+    def set(self, nodeid: ua.NodeId, value: ua.Variant):
+        self._values[nodeid] = value
+
+    def invalidate(self, nodeid: ua.NodeId):
+        self._values.pop(nodeid, None)
+
+    def changed(self, nodeid: ua.NodeId, value: ua.Variant) -> bool:
+        """Remember value for nodeid and tell whether it differs (value and type) from the cached one."""
+        if self._values.get(nodeid) == value:
+            self.Hits += 1
+            return False
+        self.Misses += 1
+        self._values[nodeid] = value
+        return True
+
+    def statistics(self) -> Dict[str, int]:
+        return {'hits': self.Hits, 'misses': self.Misses, 'nodes': len(self._values)}
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Dict, List
+
+from asyncua import ua
+
+
+class OpcUaWriteQueue:
+    """
+    Write-behind queue for server side value writes. Everything queued during one loop tick
+    is committed with a single Write call, when a node is queued twice its latest value wins.
+    """
+    _logger = logging.getLogger('Jaguar-OpcUaServer')
+
+    Queued: int
+    Written: int
+    Batches: int
+    Failed: int
+
+    def __init__(self, write):
+        self._write = write
+        self._pending: Dict[ua.NodeId, ua.WriteValue] = {}
+        self._flush_task = None
+        self._commit_lock = asyncio.Lock()
+        self.Queued = 0
+        self.Written = 0
+        self.Batches = 0
+        self.Failed = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, nodeid: ua.NodeId, datavalue: ua.DataValue):
+        self.Queued += 1
+        value = ua.WriteValue()
+        value.NodeId = nodeid
+        value.AttributeId = ua.AttributeIds.Value
+        value.Value = datavalue
+        self._pending[nodeid] = value
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_next_tick())
+
+    async def flush(self):
+        """Wait until every value queued so far is written."""
+        task = self._flush_task
+        if task is not None:
+            await asyncio.shield(task)
+        # A commit that took its values before the task above was scheduled may still be in flight
+        async with self._commit_lock:
+            pass
+
+    async def _flush_next_tick(self):
+        await asyncio.sleep(0)
+        # Commits run one after the other so that a later batch never overtakes an earlier one
+        async with self._commit_lock:
+            self._flush_task = None
+            values: List[ua.WriteValue] = list(self._pending.values())
+            self._pending = {}
+            if values:
+                await self._commit(values)
+
+    async def _commit(self, values: List[ua.WriteValue]):
+        self.Batches += 1
+        try:
+            results = await self._write(values)
+        except Exception as e:
+            self.Failed += len(values)
+            self._logger.error('Writing %s values failed: %r', len(values), e)
+            return
+        for value, result in zip(values, results):
+            if result.is_good():
+                self.Written += 1
+            else:
+                self.Failed += 1
+                self._logger.error('Writing node %s failed: %s', value.NodeId, result)
+
+    def statistics(self) -> Dict[str, int]:
+        return {'queued': self.Queued, 'written': self.Written, 'batches': self.Batches, 'failed': self.Failed}
@@ -3,7 +3,7 @@ import logging
 import re
 from typing import Dict, Any, List
 
-from asyncua import Node
+from asyncua import Node, ua
 from asyncua.ua import VariantType
 
 from OpcServer.JaguarOpcUaServer import JaguarOpcUaServer
@@ -20,6 +20,8 @@ from OpcuaBase.OpcUaParameter import OpcUaParameter
 from OpcuaBase.OpcUaPopup import OpcUaPopup
 from OpcuaBase.OpcUaPopupCmd import OpcUaPopupCmd
 from OpcuaBase.OpcUaPreRecordedMessage import OpcUaPreRecordedMessage
+from OpcuaBase.OpcUaRoute import OpcUaRoute, OpcUaRouteDomain
+from OpcuaBase.OpcUaStationStatusArray import OpcUaStationStatusArray
 
 
 def get_element_config(config: str) -> [str, str, str]:
@@ -86,6 +88,7 @@ def get_status_group_index(config: str) -> (str, int):
 
 class OpcElementFactory:
     Parameters: Dict[str, OpcUaParameter]
+    Routes: Dict[ua.NodeId, OpcUaRoute]
 
     def __init__(self, server: JaguarOpcUaServer):
         self._logger = logging.getLogger('Jaguar-ElementFactory')
@@ -97,34 +100,54 @@ class OpcElementFactory:
         self._parameters.read('Parameters.conf')
         self._server = server
         self.Parameters = {}
+        self.Routes = {}
 
-    async def _create_element(self, parent, name, element_type: OpcUaElementType, config) -> OpcUaElement:
+    def _add_route(self, node: Node, domain: str, element: str, item: str = ''):
+        self.Routes[node.nodeid] = OpcUaRoute(domain, element, item)
+
+    def _add_routes(self, domain: str, variables, nodes: [Node]):
+        for (_, name, _, _, _), node in zip(variables, nodes):
+            self._add_route(node, domain, name)
+
+    def get_routes(self) -> Dict[ua.NodeId, OpcUaRoute]:
+        """NodeId -> (domain, element, item) table, so data change dispatch needs no browse name reads."""
+        return self.Routes
+
+    async def _create_element(self, main: Node, name, element_type: OpcUaElementType, config) -> OpcUaElement:
 
         [ext, group, zone] = get_element_config(config)
         el = OpcUaElement(name, ext, element_type, int(group), zone)
         identifier = int(ext) * 10
-        el.Main = await parent.add_folder(self._server.idx, f'{name}')
-        el.Status = await self._server.add(identifier + 1, el.Main, f'{name}-ST', 16, VariantType.Byte)
-        el.Call = await self._server.add(identifier + 2, el.Main, f'{name}-CALL', 0, VariantType.Boolean)
-        el.Confirm = await self._server.add(identifier + 3, el.Main, f'{name}-CONFIRM', 0, VariantType.Boolean)
-        el.Transfer = await self._server.add(identifier + 4, el.Main, f'{name}-TRANSFER', '', VariantType.String)
-        el.PickUP = await self._server.add(identifier + 5, el.Main, f'{name}-PICKUP', 0, VariantType.Boolean)
-        el.Description = await self._server.add(identifier + 6, el.Main, f'{name}-DES', 'Init', VariantType.String)
-        el.CallGroup = await self._server.add(identifier + 7, el.Main, f'{name}-CallGroup', 0, VariantType.Boolean)
-        el.CallGroupStatus = await self._server.add(identifier + 8, el.Main, f'{name}-CallGroup-ST', 0,
-                                                    VariantType.Boolean)
+        el.Main = main
+        [el.Status, el.Call, el.Confirm, el.Transfer, el.PickUP, el.Description, el.CallGroup,
+         el.CallGroupStatus] = await self._server.add_variables(el.Main, [
+            (identifier + 1, f'{name}-ST', 16, VariantType.Byte, True),
+            (identifier + 2, f'{name}-CALL', 0, VariantType.Boolean, True),
+            (identifier + 3, f'{name}-CONFIRM', 0, VariantType.Boolean, True),
+            (identifier + 4, f'{name}-TRANSFER', '', VariantType.String, True),
+            (identifier + 5, f'{name}-PICKUP', 0, VariantType.Boolean, True),
+            (identifier + 6, f'{name}-DES', 'Init', VariantType.String, True),
+            (identifier + 7, f'{name}-CallGroup', 0, VariantType.Boolean, True),
+            (identifier + 8, f'{name}-CallGroup-ST', 0, VariantType.Boolean, True)])
+        for (item, node) in [('ST', el.Status), ('CALL', el.Call), ('CONFIRM', el.Confirm), ('TRANSFER', el.Transfer),
+                             ('PICKUP', el.PickUP), ('DES', el.Description), ('CallGroup', el.CallGroup),
+                             ('CallGroup-ST', el.CallGroupStatus)]:
+            self._add_route(node, OpcUaRouteDomain.Element, name, item)
         return el
 
     async def _create_elements(self, parent, config, element_type: OpcUaElementType) -> Dict[str, OpcUaElement]:
         elements: Dict[str, OpcUaElement] = {}
 
+        names = []
         for x in config:
             if config[x] != '0':
-                if x not in elements:
-                    el = await self._create_element(parent, x, element_type, config[x])
-                    elements[x] = el
+                if x not in names:
+                    names.append(x)
                 else:
                     self._logger.error('Element %s is exist in Dictionary', x)
+        folders = await self._server.add_folders(parent, names)
+        for x, main in zip(names, folders):
+            elements[x] = await self._create_element(main, x, element_type, config[x])
         return elements
 
     async def _create_station_elements(self) -> Dict[str, OpcUaElement]:
@@ -148,12 +171,25 @@ class OpcElementFactory:
         elements.update(await self._create_operator_elements())
         return elements
 
+    async def get_station_status_array(self, elements: Dict[str, OpcUaElement]) -> OpcUaStationStatusArray:
+        parent = await self._server.add_folder('Stations')
+        names = list(elements.keys())
+        status = OpcUaStationStatusArray(self._server, names, 16)
+        [status.Node, status.Index, status.Command] = await self._server.add_variables(parent, [
+            (7500, 'Stations-ST', list(status.Values), VariantType.Byte, False),
+            (7501, 'Stations-Index', names, VariantType.String, False),
+            (7502, 'Stations-Command', [], VariantType.String, True)])
+        self._add_route(status.Command, OpcUaRouteDomain.Command, 'Stations')
+        self._logger.info('Station status array has %s entries', len(names))
+        return status
+
     async def _create_parameter(self, parent: Node, name, config) -> OpcUaParameter:
         b = get_parameter_configs(config)
         self._logger.info(b)
         [value, typ, identifier] = b
         pr = OpcUaParameter(name, typ)
         pr.Value = await self._server.add(identifier, parent, name, value, typ)
+        self._add_route(pr.Value, OpcUaRouteDomain.Parameter, name)
         return pr
 
     async def get_parameters(self) -> Dict[str, OpcUaParameter]:
@@ -173,53 +209,46 @@ class OpcElementFactory:
         self._logger.info('Zone %s : Elements : %s', name, elements)
         el = OpcUaPagingZone(name, location, int(group), zone, elements)
         el.Node = await self._server.add(identifier, parent, f'{name}', False, VariantType.Boolean)
+        self._add_route(el.Node, OpcUaRouteDomain.Zone, name)
         return el
 
     async def _create_paging_element(self, parent: Node) -> OpcUaPaging:
 
-        pg = OpcUaPaging()
-        pg.Status = await self._server.add(6000, parent, 'Paging-Status', 'Ready...', VariantType.String, False)
-        pg.Status_Code = await self._server.add(6001, parent, 'Paging-Status-Code', 1, VariantType.Byte, False)
-        pg.Active_Channels = await self._server.add(6006, parent, 'Paging-Active-Channels', 0, VariantType.Int16, False)
-        pg.Reset = await self._server.add(6002, parent, 'Paging-Reset', 1, VariantType.Byte, True)
-
-        pg.Live = await self._server.add(6003, parent, 'Paging-Live', False, VariantType.Boolean, True)
-        pg.Live_Status = await self._server.add(6004, parent, 'Paging-Live-Status', False, VariantType.Boolean, True)
-        pg.Live_Test = await self._server.add(6005, parent, 'Paging-Live-Test', False, VariantType.Boolean, True)
-
-        pg.Broadcasting_Message = await self._server.add(6010, parent, 'Broadcasting-Message', False,
-                                                         VariantType.Boolean,
-                                                         True)
-        pg.Broadcasting_Message_No = await self._server.add(6011, parent, 'Broadcasting-Message-No', 0,
-                                                            VariantType.Int16,
-                                                            True)
-        pg.Broadcasting_Message_Status = await self._server.add(6012, parent, 'Broadcasting-Message-Status', False,
-                                                                VariantType.Boolean, True)
-
-        pg.Broadcasting_Message_Message = await self._server.add(6013, parent, 'Broadcasting-Message-Message', '',
-                                                                 VariantType.String, True)
-
-        pg.Semiautomatic_Paging = await self._server.add(6020, parent, 'Semiautomatic-Paging', False,
-                                                         VariantType.Boolean, True)
-        pg.Semiautomatic_Paging_Status = await self._server.add(6021, parent, 'Semiautomatic-Paging-Status', False,
-                                                                VariantType.Boolean, True)
-        pg.Semiautomatic_Paging_No_Repetitions = await self._server.add(6022, parent,
-                                                                        'Semiautomatic-Paging-No-Repetitions',
-                                                                        1, VariantType.Int16, True)
-        pg.Semiautomatic_Paging_Delay = await self._server.add(6023, parent, 'Semiautomatic-Paging-Delay', 5,
-                                                               VariantType.Int16, True)
-        pg.Semiautomatic_Paging_Repetition_Status = await self._server.add(6024, parent,
-                                                                           'Semiautomatic-Paging-Repetition-Status',
-                                                                           '0', VariantType.String, False)
-
-        pg.Automatic_Paging = await self._server.add(6025, parent, 'Automatic-Paging', False,
-                                                     VariantType.Boolean, True)
-
-        pg.Automatic_Paging_Status = await self._server.add(6026, parent, 'Automatic-Paging-Status', False,
-                                                            VariantType.Boolean, False)
-
-        pg.Automatic_Paging_Pause = await self._server.add(6027, parent, 'Automatic-Paging-Pause', False,
-                                                           VariantType.Boolean, True)
+        pg = OpcUaPaging(self._server)
+        variables = [
+            (6000, 'Paging-Status', 'Ready...', VariantType.String, False),
+            (6001, 'Paging-Status-Code', 1, VariantType.Byte, False),
+            (6006, 'Paging-Active-Channels', 0, VariantType.Int16, False),
+            (6002, 'Paging-Reset', 1, VariantType.Byte, True),
+
+            (6003, 'Paging-Live', False, VariantType.Boolean, True),
+            (6004, 'Paging-Live-Status', False, VariantType.Boolean, True),
+            (6005, 'Paging-Live-Test', False, VariantType.Boolean, True),
+
+            (6010, 'Broadcasting-Message', False, VariantType.Boolean, True),
+            (6011, 'Broadcasting-Message-No', 0, VariantType.Int16, True),
+            (6012, 'Broadcasting-Message-Status', False, VariantType.Boolean, True),
+            (6013, 'Broadcasting-Message-Message', '', VariantType.String, True),
+
+            (6020, 'Semiautomatic-Paging', False, VariantType.Boolean, True),
+            (6021, 'Semiautomatic-Paging-Status', False, VariantType.Boolean, True),
+            (6022, 'Semiautomatic-Paging-No-Repetitions', 1, VariantType.Int16, True),
+            (6023, 'Semiautomatic-Paging-Delay', 5, VariantType.Int16, True),
+            (6024, 'Semiautomatic-Paging-Repetition-Status', '0', VariantType.String, False),
+
+            (6025, 'Automatic-Paging', False, VariantType.Boolean, True),
+            (6026, 'Automatic-Paging-Status', False, VariantType.Boolean, False),
+            (6027, 'Automatic-Paging-Pause', False, VariantType.Boolean, True)]
+        nodes = await self._server.add_variables(parent, variables)
+        [pg.Status, pg.Status_Code, pg.Active_Channels, pg.Reset,
+         pg.Live, pg.Live_Status, pg.Live_Test,
+         pg.Broadcasting_Message, pg.Broadcasting_Message_No, pg.Broadcasting_Message_Status,
+         pg.Broadcasting_Message_Message,
+         pg.Semiautomatic_Paging, pg.Semiautomatic_Paging_Status, pg.Semiautomatic_Paging_No_Repetitions,
+         pg.Semiautomatic_Paging_Delay, pg.Semiautomatic_Paging_Repetition_Status,
+         pg.Automatic_Paging, pg.Automatic_Paging_Status,
+         pg.Automatic_Paging_Pause] = nodes
+        self._add_routes(OpcUaRouteDomain.Paging, variables, nodes)
 
         return pg
 
@@ -244,7 +273,7 @@ class OpcElementFactory:
         idx = 6201
         for z in command_config:
             n = await self._server.add(idx, parent, z, 0, VariantType.Byte)
-            cmd = OpcUaPagingAutomaticCommand(z, n)
+            cmd = OpcUaPagingAutomaticCommand(z, n, self._server)
             paging.Automatic_Paging_Commands[z] = cmd
             idx += 1
         await self._create_paging_automatic_message(message_config, parent, paging)
@@ -280,22 +309,28 @@ class OpcElementFactory:
         return pel
 
     async def _create_calling_element(self, parent: Node) -> OpcUaCalling:
-        pg = OpcUaCalling()
-        pg.Call_PreRecord_Message = await self._server.add(7000, parent, 'Call-PreRecord-Message', False,
-                                                           VariantType.Boolean,
-                                                           True)
-        pg.Call_PreRecord_Message_No = await self._server.add(7001, parent, 'Call-PreRecord-Message-No', 1,
-                                                              VariantType.Int16, True)
-        pg.Call_PreRecord_Message_Message = await self._server.add(7002, parent, 'Call-PreRecord-Message-Message',
-                                                                   'Message', VariantType.String, True)
-        pg.Call_PreRecord_Message_Status = await self._server.add(7003, parent, 'Call-PreRecord-Message-Status', False,
-                                                                  VariantType.Boolean, True)
-        pg.Call_CallGroup_Calling = await self._server.add(7010, parent, 'Call-CallGroup-Calling', False,
-                                                           VariantType.Boolean, True)
-        pg.Call_CallGroup_Status = await self._server.add(7012, parent, 'Call-CallGroup-Status', False,
-                                                          VariantType.Boolean, False)
-        pg.Call_CallGroup_Reset = await self._server.add(7013, parent, 'Call-CallGroup-Reset', False,
-                                                         VariantType.Boolean, False)
+        pg = OpcUaCalling(self._server)
+        variables = [
+            (7000, 'Call-PreRecord-Message', False, VariantType.Boolean, True),
+            (7001, 'Call-PreRecord-Message-No', 1, VariantType.Int16, True),
+            (7002, 'Call-PreRecord-Message-Message', 'Message', VariantType.String, True),
+            (7003, 'Call-PreRecord-Message-Status', False, VariantType.Boolean, True),
+            (7010, 'Call-CallGroup-Calling', False, VariantType.Boolean, True),
+            (7012, 'Call-CallGroup-Status', False, VariantType.Boolean, False),
+            (7013, 'Call-CallGroup-Reset', False, VariantType.Boolean, False),
+            (7014, 'Call-CallGroup-Members', 0, VariantType.UInt16, False),
+            (7015, 'Call-CallGroup-Dialing', 0, VariantType.UInt16, False),
+            (7016, 'Call-CallGroup-Connected', 0, VariantType.UInt16, False),
+            (7017, 'Call-CallGroup-Failed', 0, VariantType.UInt16, False),
+            (7018, 'Call-CallGroup-Progress', [], VariantType.String, False)]
+        nodes = await self._server.add_variables(parent, variables)
+        [pg.Call_PreRecord_Message, pg.Call_PreRecord_Message_No, pg.Call_PreRecord_Message_Message,
+         pg.Call_PreRecord_Message_Status,
+         pg.Call_CallGroup_Calling, pg.Call_CallGroup_Status,
+         pg.Call_CallGroup_Reset,
+         pg.Call_CallGroup_Members, pg.Call_CallGroup_Dialing, pg.Call_CallGroup_Connected,
+         pg.Call_CallGroup_Failed, pg.Call_CallGroup_Progress] = nodes
+        self._add_routes(OpcUaRouteDomain.Calling, variables, nodes)
 
         return pg
 
@@ -311,26 +346,25 @@ class OpcElementFactory:
                 pel.PreRecordedMessages[index] = OpcUaPreRecordedMessage(index, title, filename)
         return pel
 
-    async def _check_group_status(self, el: OpcUaElementGroupStatus, parent: Node, group: str):
-        if group not in el.Status_Group:
-            self._logger.info('Group %s not exist. Create group %s node', group, group)
-            node = await self._server.add(el.Identifier, parent, f'groupST{group}', 0, VariantType.Byte)
-            el.add_group(group, node)
-
-    async def _create_element_status(self, extension: str, config: str, status: OpcUaElementGroupStatus, parent: Node):
-        (group, index) = get_status_group_index(config)
-        if group != '-':
-            await self._check_group_status(status, parent, group)
-            self._logger.info('Add Extension %s to Group %s with index %s', extension, group, index)
-            status.add(extension, group, index)
-
     async def get_elements_status_group(self) -> OpcUaElementGroupStatus:
         config = self._config['Extensions Status Group']
         parent = await self._server.add_folder('GroupStatus')
-        status = OpcUaElementGroupStatus()
+        status = OpcUaElementGroupStatus(self._server, self._server.settings('GroupStatus'))
+        members = []
         for x in config:
             if config[x] != '0':
-                await self._create_element_status(x, config[x], status, parent)
+                (group, index) = get_status_group_index(config[x])
+                if group != '-':
+                    members.append((x, group, index))
+        groups = list(dict.fromkeys(group for (_, group, _) in members))
+        self._logger.info('Create %s %s status groups', len(groups), status.Group_Type)
+        nodes = await self._server.add_variables(parent, [
+            (status.Identifier + i, f'groupST{group}', status.initial_value(), status.Variant_Type, True)
+            for i, group in enumerate(groups)])
+        for group, node in zip(groups, nodes):
+            status.add_group(group, node)
+        for (extension, group, index) in members:
+            status.add(extension, group, index)
         return status
 
     # IP Cams And Popup System Tags
@@ -339,18 +373,23 @@ class OpcElementFactory:
         ident = int(identifier) * 10
         ipcam = OpcUaCamera(tag, ident, nvr, channel)
         ipcam.Main = await parent.add_folder(self._server.idx, f'{tag}')
-        ipcam.Status = await self._server.add(ident, ipcam.Main, f'{tag}-ST', 2, VariantType.Byte)
-        ipcam.Popup = await self._server.add(ident + 1, ipcam.Main, f'{tag}-RQ', False, VariantType.Boolean)
-        ipcam.Value = await self._server.add(ident + 2, ipcam.Main, f'{tag}-VL', 65535, VariantType.UInt16)
+        [ipcam.Status, ipcam.Popup, ipcam.Value] = await self._server.add_variables(ipcam.Main, [
+            (ident, f'{tag}-ST', 2, VariantType.Byte, True),
+            (ident + 1, f'{tag}-RQ', False, VariantType.Boolean, True),
+            (ident + 2, f'{tag}-VL', 65535, VariantType.UInt16, True)])
+        self._add_route(ipcam.Status, OpcUaRouteDomain.Popup, tag, 'ST')
+        self._add_route(ipcam.Popup, OpcUaRouteDomain.Popup, tag, 'RQ')
+        self._add_route(ipcam.Value, OpcUaRouteDomain.Popup, tag, 'VL')
         return ipcam
 
         # IP Cams POP-UP Commands
 
     async def _create_IPCam_Command(self, parent: Node, popup: OpcUaPopup, cmd):
         if cmd not in popup.Commands:
-            opc_command = OpcUaPopupCmd(cmd)
+            opc_command = OpcUaPopupCmd(cmd, self._server)
             identifier = 890000 + len(popup.Commands)
             opc_command.Node = await self._server.add(identifier, parent, cmd, 0, VariantType.Byte)
+            self._add_route(opc_command.Node, OpcUaRouteDomain.PopupCmd, cmd)
             popup.Commands[cmd] = opc_command
             self._logger.info('Create %s  POP UP Command!', cmd)
 
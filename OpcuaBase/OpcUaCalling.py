@@ -4,6 +4,7 @@ from typing import Dict
 from asyncua import Node
 from asyncua.ua import VariantType
 
+from OpcServer.JaguarOpcUaServer import JaguarOpcUaServer
 from OpcuaBase.OpcUaPreRecordedMessage import OpcUaPreRecordedMessage
 
 
@@ -16,12 +17,18 @@ class OpcUaCalling:
     Call_CallGroup_Calling: Node
     Call_CallGroup_Status: Node
     Call_CallGroup_Reset: Node
+    Call_CallGroup_Members: Node
+    Call_CallGroup_Dialing: Node
+    Call_CallGroup_Connected: Node
+    Call_CallGroup_Failed: Node
+    Call_CallGroup_Progress: Node
 
     PreRecordedMessages: Dict[int, OpcUaPreRecordedMessage]
 
     Call_APP_Message_FileName: str = ''
 
-    def __init__(self):
+    def __init__(self, server: JaguarOpcUaServer):
+        self._server = server
         self._logger = logging.getLogger('Jaguar-Calling')
         self.PreRecordedMessages = {}
 
@@ -32,13 +39,26 @@ class OpcUaCalling:
                 self.Call_CallGroup_Reset]
 
     async def set_announcement(self, val):
-        await self.Call_PreRecord_Message_Status.set_value(val, VariantType.Boolean)
+        self._server.write_value(self.Call_PreRecord_Message_Status, val, VariantType.Boolean)
 
     async def set_announcement_message(self):
-        mm = await self.Call_PreRecord_Message_No.get_value()
+        mm = self._server.read_value(self.Call_PreRecord_Message_No)
         self._logger.info(f'Set ann message to {mm}')
         if mm in self.PreRecordedMessages.keys():
             msg = self.PreRecordedMessages[mm]
             self._logger.info(f'Set ann {msg.Title} file to  {msg.FileName}')
-            await self.Call_PreRecord_Message_Message.set_value(msg.Title, VariantType.String)
+            self._server.write_value(self.Call_PreRecord_Message_Message, msg.Title, VariantType.String)
             self.Call_APP_Message_FileName = msg.FileName
+
+    async def set_call_group_progress(self, states: Dict[str, str]):
+        """Member counts per state and an 'extension:state' entry for every member of the running call group."""
+        counts = {'Dialing': 0, 'Connected': 0, 'Failed': 0}
+        for state in states.values():
+            if state in counts:
+                counts[state] += 1
+        self._server.write_value(self.Call_CallGroup_Members, len(states), VariantType.UInt16)
+        self._server.write_value(self.Call_CallGroup_Dialing, counts['Dialing'], VariantType.UInt16)
+        self._server.write_value(self.Call_CallGroup_Connected, counts['Connected'], VariantType.UInt16)
+        self._server.write_value(self.Call_CallGroup_Failed, counts['Failed'], VariantType.UInt16)
+        self._server.write_value(self.Call_CallGroup_Progress, [f'{ext}:{state}' for ext, state in states.items()],
+                                 VariantType.String)
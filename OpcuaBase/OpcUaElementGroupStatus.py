@@ -1,9 +1,22 @@
+import asyncio
+from configparser import SectionProxy
 import logging
-from typing import Dict
+from typing import Dict, Set
 
 from asyncua import Node
 from asyncua.ua import VariantType
 
+from OpcServer.JaguarOpcUaServer import JaguarOpcUaServer
+
+# Group node types, the number is the group width in bytes (ByteArray takes it from the config)
+GROUP_TYPES: Dict[str, tuple] = {
+    'Byte': (VariantType.Byte, 1),
+    'UInt16': (VariantType.UInt16, 2),
+    'UInt32': (VariantType.UInt32, 4),
+    'UInt64': (VariantType.UInt64, 8),
+    'ByteArray': (VariantType.Byte, None),
+}
+
 
 class ElementStatus:
     Extension: str
@@ -19,66 +32,105 @@ class ElementStatus:
 
 
 class GroupStatus:
+    """Status bits of a group packed into bytes, bit 0 is the lowest bit of the first byte."""
     Group: str
     Node: Node
+    Bits: bytearray
     Current_Value: int
 
-    def __init__(self, group: str, node: Node):
+    def __init__(self, group: str, node: Node, width: int):
         self.Group = group
         self.Node = node
+        self.Bits = bytearray(width)
         self.Current_Value = 0
 
+    def size(self) -> int:
+        return len(self.Bits) * 8
 
-def _calculate_new_value(node_value: int, index: int, val: bool) -> int:
-    r = pow(2, index)
-    rs = node_value & r
-    if val & rs != r:
-        return node_value ^ r
-    elif not val & rs != 0:
-        return node_value ^ r
-    else:
-        return node_value
-
-
-async def _update_group_status(group_status: GroupStatus, element_status: ElementStatus, value: bool):
-    gv = _calculate_new_value(group_status.Current_Value, element_status.Index, value)
-    await group_status.Node.set_value(gv, VariantType.Byte)
-    group_status.Current_Value = gv
-    element_status.Current_Value = value
+    def set(self, index: int, value: bool) -> bool:
+        """Set a member bit and tell whether the group changed."""
+        mask = 1 << (index % 8)
+        byte = self.Bits[index // 8]
+        new = byte | mask if value else byte & ~mask
+        if new == byte:
+            return False
+        self.Bits[index // 8] = new
+        self.Current_Value = int.from_bytes(self.Bits, 'little')
+        return True
 
 
 class OpcUaElementGroupStatus:
     Status_Group: Dict[str, GroupStatus]
     Elements: Dict[str, ElementStatus]
     Identifier: int
+    Group_Type: str
+    Variant_Type: VariantType
+    Width: int
 
-    def __init__(self):
+    def __init__(self, server: JaguarOpcUaServer, config: SectionProxy):
+        self._server = server
         self._logger = logging.getLogger('Jaguar-ElementGroupStatus')
+        self.Group_Type = config.get('Type', fallback='Byte')
+        if self.Group_Type not in GROUP_TYPES:
+            self._logger.error('Unknown group status type %s, Byte is used', self.Group_Type)
+            self.Group_Type = 'Byte'
+        (self.Variant_Type, self.Width) = GROUP_TYPES[self.Group_Type]
+        if self.Width is None:
+            self.Width = config.getint('Size', fallback=8)
         self.Status_Group = {}
         self.Elements = {}
         self.Identifier = 7700
+        self._dirty: Set[str] = set()
+        self._flush_scheduled = False
+
+    def initial_value(self):
+        """Value of a group node without active members."""
+        if self.Group_Type == 'ByteArray':
+            return [0] * self.Width
+        return 0
 
     def add_group(self, group: str, node: Node):
-        self._logger.info('Add Status Group %s to OpcUaElementGroupStatus')
+        self._logger.info('Add Status Group %s to OpcUaElementGroupStatus', group)
         if group not in self.Status_Group:
-            self.Status_Group[group] = GroupStatus(group, node)
+            self.Status_Group[group] = GroupStatus(group, node, self.Width)
             self.Identifier += 1
 
     def add(self, extension: str, group: str, index: int):
         self._logger.info('Add extension %s to Group %s with index %s', extension, group, index)
+        if not 0 <= index < self.Width * 8:
+            self._logger.error('Index %s of extension %s does not fit into a %s group', index, extension,
+                               self.Group_Type)
+            return
         if extension not in self.Elements:
             self.Elements[extension] = ElementStatus(extension, group, index)
 
     async def set_extension_status(self, extension: str, value: bool):
-        self._logger.info('Set extension %s Status to %s', extension, value)
-        if extension in self.Elements:
-            el = self.Elements[extension]
-            grp = self.Status_Group[el.Group]
-            self._logger.info('extension %s and Group %s are found!', extension, grp.Group)
-            self._logger.info('value is  %s, Current_Value is %s', value, el.Current_Value)
-            if value != el.Current_Value and el.Group in self.Status_Group:
-                self._logger.info('Group %s value need Change to current = %s', grp.Group, grp.Current_Value)
-                await _update_group_status(grp, el, value)
-                self._logger.info('Group %s new Value is changed to %s', grp.Group, grp.Current_Value)
+        el = self.Elements.get(extension)
+        if el is None or el.Group not in self.Status_Group:
+            self._logger.debug('extension %s not Found!', extension)
+            return
+        if value == el.Current_Value:
+            return
+        el.Current_Value = value
+        grp = self.Status_Group[el.Group]
+        if grp.set(el.Index, value):
+            self._logger.debug('Group %s new Value is %s', grp.Group, grp.Current_Value)
+            self._mark_dirty(grp.Group)
+
+    def _mark_dirty(self, group: str):
+        # Members changing in the same loop tick end up in a single write of their group
+        self._dirty.add(group)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        dirty = self._dirty
+        self._dirty = set()
+        for group in dirty:
+            grp = self.Status_Group[group]
+            if self.Group_Type == 'ByteArray':
+                self._server.write_value(grp.Node, list(grp.Bits), self.Variant_Type)
             else:
-                self._logger.info('extension %s not Found!', extension)
+                self._server.write_value(grp.Node, grp.Current_Value, self.Variant_Type)
@@ -0,0 +1,49 @@
+import logging
+from typing import Dict, List
+
+from OpcuaBase.OpcUaElement import OpcUaElement
+
+
+class OpcUaElementRegistry:
+    Elements: Dict[str, OpcUaElement]
+
+    def __init__(self, elements: Dict[str, OpcUaElement]):
+        self._logger = logging.getLogger('Jaguar-ElementRegistry')
+        self.Elements = elements
+        self._order: Dict[str, int] = {}
+        self._by_extension: Dict[str, OpcUaElement] = {}
+        self._masters: List[OpcUaElement] = []
+        self._call_group: Dict[str, OpcUaElement] = {}
+        for name in elements:
+            self._add(elements[name])
+
+    def _add(self, el: OpcUaElement):
+        self._order[el.Name] = len(self._order)
+        if el.Extension in self._by_extension:
+            self._logger.error('Extension %s of %s is already used by %s', el.Extension, el.Name,
+                               self._by_extension[el.Extension].Name)
+        else:
+            self._by_extension[el.Extension] = el
+        if el.Zone == 'MST':
+            self._masters.append(el)
+        if el.CallGroupSelected:
+            self._call_group[el.Name] = el
+
+    def get_by_extension(self, extension: str) -> OpcUaElement:
+        return self._by_extension.get(extension)
+
+    def get_master(self) -> OpcUaElement:
+        if len(self._masters) > 0:
+            return self._masters[0]
+        return None
+
+    def get_call_group_selected(self) -> List[OpcUaElement]:
+        # Keep the Stations.conf order, the call group is originated in this order
+        return sorted(self._call_group.values(), key=lambda x: self._order[x.Name])
+
+    def set_call_group_selected(self, el: OpcUaElement, selected: bool):
+        el.CallGroupSelected = selected
+        if selected:
+            self._call_group[el.Name] = el
+        else:
+            self._call_group.pop(el.Name, None)
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from asyncio import Task
 from typing import Dict, List
@@ -5,6 +6,7 @@ from typing import Dict, List
 from asyncua import Node
 from asyncua.ua import VariantType
 
+from OpcServer.JaguarOpcUaServer import JaguarOpcUaServer
 from OpcuaBase.OpcUaPagingAutomatic import OpcUaPagingAutomaticCommand
 from OpcuaBase.OpcUaPagingZone import OpcUaPagingZone
 from OpcuaBase.OpcUaPreRecordedMessage import OpcUaPreRecordedMessage
@@ -43,7 +45,8 @@ class OpcUaPaging:
     Automatic_Paging_Active_Pagers: Dict[int, List[str]]
     Automatic_Paging_Task: Task
     Automatic_Paging_Keep_Alive: bool
-    Automatic_Paging_Pause: bool
+    Automatic_Paging_Paused: bool
+    Automatic_Paging_Idle: asyncio.Event
 
     PreRecordedMessages: Dict[int, OpcUaPreRecordedMessage]
 
@@ -70,11 +73,18 @@ class OpcUaPaging:
 
     Paging_APP_Broadcast_FileName: str = ''
 
-    def __init__(self):
+    def __init__(self, server: JaguarOpcUaServer):
+        self._server = server
         self.Zones = {}
         self.PreRecordedMessages = {}
         self.Automatic_Paging_Commands = {}
         self.Automatic_Paging_Messages = {}
+        self.Automatic_Paging_Keep_Alive = False
+        self.Automatic_Paging_Paused = False
+        # Set while no automatic group is active, a pause is acknowledged by it
+        self.Automatic_Paging_Idle = asyncio.Event()
+        self.Automatic_Paging_Idle.set()
+        self._automatic_paging_changed = asyncio.Condition()
         self._logger = logging.getLogger('Jaguar-Paging')
 
     def get_nodes(self):
@@ -92,6 +102,23 @@ class OpcUaPaging:
             x.append(self.Zones[zone].Node)
         return x
 
+    async def set_automatic_state(self, keep_alive: bool = None, paused: bool = None):
+        """Change the automatic paging state and wake the automatic paging loop."""
+        async with self._automatic_paging_changed:
+            if keep_alive is not None:
+                self.Automatic_Paging_Keep_Alive = keep_alive
+            if paused is not None:
+                self.Automatic_Paging_Paused = paused
+            self._automatic_paging_changed.notify_all()
+
+    async def wait_automatic_state(self, predicate):
+        """Sleep until predicate() holds, it is checked again on every set_automatic_state."""
+        async with self._automatic_paging_changed:
+            await self._automatic_paging_changed.wait_for(predicate)
+
+    def automatic_running(self) -> bool:
+        return self.Automatic_Paging_Keep_Alive and not self.Automatic_Paging_Paused
+
     def _reset_requests(self):
         self._logger.info('Reset Paging Requests')
         self.Paging_APP_Live_Start_Request = False
@@ -178,14 +205,14 @@ class OpcUaPaging:
     async def _set_paging_status(self, status: int, msg: str):
         if status != self.Paging_APP_Status:
             self.Paging_APP_Status = status
-            await self.Status.set_value(msg, VariantType.String)
-            await self.Status_Code.set_value(status, VariantType.Byte)
+            self._server.write_value(self.Status, msg, VariantType.String)
+            self._server.write_value(self.Status_Code, status, VariantType.Byte)
 
     async def _set_live_status(self, status: bool):
         self._logger.info('Set Live Status - APP_Live_Status :%s Status:%s', self.Paging_APP_Live_Status, status)
         self.Paging_APP_Live_Status = status
-        await self.Live_Status.set_value(status, VariantType.Boolean)
-        await self.Live.set_value(status, VariantType.Boolean)
+        self._server.write_value(self.Live_Status, status, VariantType.Boolean)
+        self._server.write_value(self.Live, status, VariantType.Boolean)
         self.Paging_APP_Live_Start_Request = False
         self.Paging_APP_Live_Stop_Request = False
 
@@ -194,27 +221,27 @@ class OpcUaPaging:
                           status)
         if self.Paging_APP_Broadcast_Status != status:
             self.Paging_APP_Broadcast_Status = status
-            await self.Broadcasting_Message_Status.set_value(status, VariantType.Boolean)
-            await self.Broadcasting_Message.set_value(status, VariantType.Boolean)
+            self._server.write_value(self.Broadcasting_Message_Status, status, VariantType.Boolean)
+            self._server.write_value(self.Broadcasting_Message, status, VariantType.Boolean)
 
     async def _set_semi_automatic_status(self, status: bool):
         if self.Paging_APP_Semi_Automatic_Status != status:
             self.Paging_APP_Semi_Automatic_Status = status
-            await self.Semiautomatic_Paging_Status.set_value(status, VariantType.Boolean)
-            await self.Semiautomatic_Paging.set_value(status, VariantType.Boolean)
+            self._server.write_value(self.Semiautomatic_Paging_Status, status, VariantType.Boolean)
+            self._server.write_value(self.Semiautomatic_Paging, status, VariantType.Boolean)
 
     async def _set_automatic_status(self, status: bool):
         self._logger.info('Set Automatic Paging Status - Paging_APP_Automatic_Status :%s Status:%s',
                           self.Paging_APP_Automatic_Status, status)
         if self.Paging_APP_Automatic_Status != status:
             self.Paging_APP_Automatic_Status = status
-            await self.Automatic_Paging_Status.set_value(status, VariantType.Boolean)
+            self._server.write_value(self.Automatic_Paging_Status, status, VariantType.Boolean)
 
     async def set_pre_recorded_message(self):
-        mm = await self.Broadcasting_Message_No.get_value()
+        mm = self._server.read_value(self.Broadcasting_Message_No)
         if mm in self.PreRecordedMessages.keys():
             msg = self.PreRecordedMessages[mm]
-            await self.Broadcasting_Message_Message.set_value(msg.Title, VariantType.String)
+            self._server.write_value(self.Broadcasting_Message_Message, msg.Title, VariantType.String)
             self.Paging_APP_Broadcast_FileName = msg.FileName
 
     def log_status(self):
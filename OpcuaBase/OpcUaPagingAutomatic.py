@@ -3,6 +3,8 @@ from typing import Dict
 
 from asyncua import Node
 
+from OpcServer.JaguarOpcUaServer import JaguarOpcUaServer
+
 
 class OpcUaPagingAutomaticMessage:
     Name: str
@@ -34,8 +36,9 @@ class OpcUaPagingAutomaticCommand:
     CMD: Node
     Message: Dict[int, OpcUaPagingAutomaticMessage]
 
-    def __init__(self, name: str, cmd: Node):
+    def __init__(self, name: str, cmd: Node, server: JaguarOpcUaServer):
         self._logger = logging.getLogger('Jaguar-Automatic-Command')
+        self._server = server
         self.Name = name
         self.Messages = {}
         self.CMD = cmd
@@ -46,12 +49,12 @@ class OpcUaPagingAutomaticCommand:
 
     async def GetAutoMaticPagers(self):
         x: Dict[int, OpcUaPagingAutomaticMessage] = {}
-        vl = await self.CMD.get_value()
+        vl = self._server.read_value(self.CMD)
         indexes = _get_active_index(vl)
         for p in indexes:
             if p in self.Messages.keys():
                 x[p] = self.Messages[p]
         for m in x:
-            msg = await x[m].Message.get_value()
+            msg = self._server.read_value(x[m].Message)
             self._logger.info(' ---- ---- CMD:%s , Bit:%i, MSG:%s', self.Name, m, msg)
         return x
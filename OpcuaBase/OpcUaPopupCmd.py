@@ -2,6 +2,8 @@ import logging
 from typing import Dict, List
 from asyncua import Node
 
+from OpcServer.JaguarOpcUaServer import JaguarOpcUaServer
+
 
 def compare(new: int, old: int):
     result = []
@@ -24,13 +26,14 @@ class OpcUaPopupCmd:
     BitMap: Dict[int, str]
     LastState: int = 0
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, server: JaguarOpcUaServer):
         self.Name = name
+        self._server = server
         self.BitMap = {}
 
     async def GetActiveTags(self) -> List[str]:
         tags: List[str] = []
-        val = await self.Node.get_value()
+        val = self._server.read_value(self.Node)
         self._logger.info('%s Command Value is %s', self.Name, val)
         res = compare(val, self.LastState)
         self._logger.info('%s Command Compare Result count %s', self.Name, len(res))
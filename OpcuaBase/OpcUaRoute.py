@@ -0,0 +1,23 @@
+class OpcUaRouteDomain:
+    Element = 'Element'
+    Paging = 'Paging'
+    Zone = 'Zone'
+    Calling = 'Calling'
+    Parameter = 'Parameter'
+    Popup = 'Popup'
+    PopupCmd = 'PopupCmd'
+    Command = 'Command'
+
+
+class OpcUaRoute:
+    Domain: str
+    Element: str
+    Item: str
+
+    def __init__(self, domain: str, element: str, item: str = ''):
+        self.Domain = domain
+        self.Element = element
+        self.Item = item
+
+    def __repr__(self):
+        return f'{self.Domain}:{self.Element}:{self.Item}'
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from typing import Dict, List
+
+from asyncua import Node
+from asyncua.ua import VariantType
+
+from OpcServer.JaguarOpcUaServer import JaguarOpcUaServer
+
+
+class OpcUaStationStatusArray:
+    """
+    Status of every station in one Byte[] node, so a client monitors one item instead of one per station.
+    Entry i belongs to Names[i], the names are published in the Index node in the same order.
+    Command is the String[] node a client writes batches of "station,command,argument" entries to.
+    """
+    Node: Node
+    Index: Node
+    Command: Node
+    Names: List[str]
+    Values: bytearray
+
+    def __init__(self, server: JaguarOpcUaServer, names: List[str], initial: int):
+        self._server = server
+        self._logger = logging.getLogger('Jaguar-StationStatusArray')
+        self.Names = names
+        self.Values = bytearray([initial] * len(names))
+        self._positions: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        self._flush_scheduled = False
+
+    def set(self, name: str, value: int):
+        i = self._positions.get(name)
+        if i is None:
+            self._logger.error('Station %s has no entry in the status array', name)
+            return
+        if self.Values[i] == value:
+            return
+        self.Values[i] = value
+        # All stations changing in the same loop tick are published with a single write
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        self._server.write_value(self.Node, list(self.Values), VariantType.Byte)
@@ -1,19 +1,110 @@
+import asyncio
 import logging
+import time
+from typing import Dict
 
 from asyncua import Node
 
 
 class OpcUaSubscriptionHandler:
+    """
+    Data change notifications are queued and handled by worker tasks, a slow callback does not stall the
+    publish path of the subscription. All notifications of a node go to the same worker and keep their order.
+    """
     _logger = logging.getLogger('Jaguar-OpcUaSubscriptionHandler')
 
-    def __init__(self):
+    Name: str
+    Received: int
+    Processed: int
+    Dropped: int
+    Max_Depth: int
+
+    def __init__(self, name: str = '', workers: int = 1, queue_size: int = 1000):
+        self.Name = name
         self._on_data_changed_subscribers = set()
+        self._pending_initial_values = set()
+        self._initial_values_received = asyncio.Event()
+        self._initial_values_received.set()
+        self._queues = [asyncio.Queue(queue_size) for _ in range(max(workers, 1))]
+        self._workers = []
+        self.Received = 0
+        self.Processed = 0
+        self.Dropped = 0
+        self.Max_Depth = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def expect_initial_values(self, nodes):
+        """Register nodes whose initial data change notification has to arrive before the handler is ready."""
+        for node in nodes:
+            self._pending_initial_values.add(node.nodeid)
+        if self._pending_initial_values:
+            self._initial_values_received.clear()
+
+    def drop_initial_value(self, node):
+        """Stop waiting for the initial value of a node that could not be monitored."""
+        self._pending_initial_values.discard(node.nodeid)
+        if not self._pending_initial_values:
+            self._initial_values_received.set()
+
+    async def wait_initial_values(self):
+        await self._initial_values_received.wait()
 
     async def datachange_notification(self, node: Node, val, data):
         self._logger.debug('datachange_notification %r %s', node, val)
-        for callback in self._on_data_changed_subscribers:
-            self._logger.debug('call back method  %r ', callback)
-            await callback(node, val, data)
+        if self._pending_initial_values:
+            self._pending_initial_values.discard(node.nodeid)
+            if not self._pending_initial_values:
+                self._initial_values_received.set()
+        if not self._on_data_changed_subscribers:
+            return
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker(q)) for q in self._queues]
+        self.Received += 1
+        queue = self._queues[hash(node.nodeid) % len(self._queues)]
+        try:
+            queue.put_nowait((time.perf_counter(), node, val, data))
+        except asyncio.QueueFull:
+            self.Dropped += 1
+            self._logger.error('%s queue is full, data change of %s to %s is dropped', self.Name, node, val)
+            return
+        self.Max_Depth = max(self.Max_Depth, self.depth())
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            (queued, node, val, data) = await queue.get()
+            for callback in self._on_data_changed_subscribers:
+                self._logger.debug('call back method  %r ', callback)
+                try:
+                    await callback(node, val, data)
+                except Exception as e:
+                    self._logger.exception('%s callback for %s failed: %r', self.Name, node, e)
+            latency = time.perf_counter() - queued
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+            self.Processed += 1
+            queue.task_done()
+
+    def stop(self):
+        """Cancel the workers, notifications still queued are dropped."""
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        for queue in self._queues:
+            while not queue.empty():
+                queue.get_nowait()
+                queue.task_done()
+        self._on_data_changed_subscribers.clear()
+
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def statistics(self) -> Dict[str, float]:
+        """Queue depth, drops and latency from queueing a notification until its callbacks are done."""
+        return {'received': self.Received, 'processed': self.Processed, 'dropped': self.Dropped,
+                'depth': self.depth(), 'max_depth': self.Max_Depth,
+                'avg_latency': round(self._latency_total / self.Processed, 4) if self.Processed else 0.0,
+                'max_latency': round(self._latency_max, 4)}
 
     def on_data_changed(self, call_back):
         self._logger.debug('New on_data_changed Subscription')
@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from Core.Jaguar import Jaguar
+from Simulator.AmiSimulator import AmiSimulator, read_extensions
+from Voice.AmiRecorder import read_recording
+
+# Replays an AMI event recording ([Events] Record of Asterisk.conf) through SoftSwitchServer into the OPC UA
+# address space of a Jaguar built from the configuration in the working directory. Actions the events trigger
+# are answered by the AMI simulator. Reports the throughput and the latency of every event from being fed
+# until its OPC UA values are written. A speed of 0 replays as fast as possible:
+#   python -m Simulator.AmiReplay events.jsonl --speed 10
+
+
+async def _replay_event(jaguar: Jaguar, text: str, latencies: [float]):
+    started = time.perf_counter()
+    if await jaguar._softSwitchServer.replay_event(text):
+        await jaguar._opcUaServer.flush()
+        latencies.append(time.perf_counter() - started)
+
+
+async def replay(jaguar: Jaguar, events: [(float, str)], speed: float) -> ([float], float):
+    """Feed the events at their recorded pace divided by speed, returns the latencies and the wall time."""
+    latencies = []
+    tasks = []
+    first = events[0][0] if events else 0
+    started = time.perf_counter()
+    for i, (t, text) in enumerate(events):
+        if speed > 0:
+            delay = (t - first) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif i % 50 == 0:
+            # A socket read hands over a few dozen events at a time
+            await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(_replay_event(jaguar, text, latencies)))
+    await asyncio.gather(*tasks)
+    return latencies, time.perf_counter() - started
+
+
+async def main(args):
+    events = list(read_recording(args.recording))
+    jaguar = Jaguar()
+    switch = jaguar._softSwitchServer
+    if switch._config.has_section('Events'):
+        switch._config.set('Events', 'Record', '')
+    simulator = AmiSimulator(switch._server_config['user'], switch._server_config['secret'], read_extensions())
+    port = await simulator.start('127.0.0.1', 0)
+    switch._server_config['host'] = '127.0.0.1'
+    switch._server_config['port'] = str(port)
+    await jaguar._init_opcua()
+    await jaguar._init_softswitch()
+    await jaguar._init_events()
+    await switch.connect()
+    latencies, wall = await replay(jaguar, events, args.speed)
+    latencies.sort()
+    handled = len(latencies)
+    print(f'{len(events)} events replayed at {"max" if args.speed <= 0 else f"{args.speed}x"} speed in {wall:.3f}s, '
+          f'{handled} handled ({handled / wall:.0f}/s), {len(events) - handled} dropped')
+    if latencies:
+        print(f'latency to OPC UA  avg {statistics.mean(latencies) * 1000:.2f}ms  '
+              f'p50 {statistics.median(latencies) * 1000:.2f}ms  '
+              f'p95 {latencies[int(handled * 0.95)] * 1000:.2f}ms  p99 {latencies[int(handled * 0.99)] * 1000:.2f}ms  '
+              f'max {latencies[-1] * 1000:.2f}ms')
+    print(f'OPC UA writes: {jaguar._opcUaServer.write_statistics()}')
+    switch._manager.close()
+    simulator.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.ERROR)
+    parser = argparse.ArgumentParser(description='Replay a recorded AMI event stream through Jaguar')
+    parser.add_argument('recording', help='file written by Asterisk.conf [Events] Record')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed factor, 0 replays at max speed')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,447 @@
+import argparse
+import asyncio
+import configparser
+import itertools
+import logging
+import random
+import re
+from typing import Dict, List, Set
+
+# A stand-in for Asterisk on the AMI port. It logs in the user of Asterisk.conf [SERVER], answers the actions
+# SoftSwitchServer sends, plays the calls and conferences they start and streams randomized or scripted event
+# storms. Point Asterisk.conf host at it to run Jaguar or the benchmarks without a PBX:
+#   python -m Simulator.AmiSimulator --port 5038 --calls 50 --conferences 5 --queues 2 --noise 500
+
+EOL = '\r\n'
+
+# Event class of every event the simulator sends, an Events mask lets a session choose between them
+EVENT_CLASSES = {'FullyBooted': 'system', 'PeerStatus': 'system', 'Newstate': 'call', 'Hangup': 'call',
+                 'DialState': 'call', 'OriginateResponse': 'call', 'VarSet': 'dialplan', 'RTCPSent': 'reporting',
+                 'ConfbridgeStart': 'call', 'ConfbridgeEnd': 'call', 'ConfbridgeJoin': 'call',
+                 'ConfbridgeLeave': 'call', 'QueueCallerJoin': 'agent', 'QueueCallerLeave': 'agent',
+                 'QueueCallerAbandon': 'agent', 'QueueMemberStatus': 'agent'}
+
+
+def format_message(fields: Dict[str, object]) -> str:
+    return ''.join(f'{k}: {v}{EOL}' for k, v in fields.items()) + EOL
+
+
+def read_extensions(filename: str = 'Stations.conf') -> [str]:
+    """Extensions of the operators, stations and pagers of Stations.conf."""
+    # Not strict, the camera section of the shipped Stations.conf repeats a tag
+    config = configparser.ConfigParser(strict=False)
+    config.optionxform = str
+    config.read(filename)
+    extensions = []
+    for section in ['Operator', 'Extension', 'Pagers']:
+        if config.has_section(section):
+            extensions.extend(v.split(',')[0].strip() for v in config[section].values())
+    return extensions
+
+
+class AmiSimulatorSession(asyncio.Protocol):
+    """One AMI connection, it keeps the login state, event mask and filters of the client."""
+
+    Authenticated: bool
+    Events: Set[str]
+    Filters: List[re.Pattern]
+
+    def __init__(self, simulator: 'AmiSimulator'):
+        self._simulator = simulator
+        self._transport = None
+        self._buffer = ''
+        self.Authenticated = False
+        self.Events = set()
+        self.Filters = []
+
+    def connection_made(self, transport):
+        self._transport = transport
+        self._simulator.Sessions.append(self)
+        transport.write(f'Asterisk Call Manager/5.0.1{EOL}'.encode())
+
+    def connection_lost(self, exc):
+        if self in self._simulator.Sessions:
+            self._simulator.Sessions.remove(self)
+
+    def data_received(self, data):
+        self._buffer += data.decode('utf8', 'ignore')
+        *blocks, self._buffer = self._buffer.split(EOL + EOL)
+        for block in blocks:
+            action = {}
+            for line in block.split(EOL):
+                key, sep, value = line.partition(':')
+                if sep:
+                    action[key.strip()] = value.strip()
+            if action:
+                asyncio.ensure_future(self._simulator.handle(self, action))
+
+    def set_events(self, mask: str):
+        mask = mask.lower()
+        if mask in ('on', 'yes', 'true', 'all'):
+            self.Events = set(EVENT_CLASSES.values())
+        elif mask in ('off', 'no', 'false', ''):
+            self.Events = set()
+        else:
+            self.Events = {x.strip() for x in mask.split(',')}
+
+    def send(self, fields: Dict[str, object]):
+        if not self._transport.is_closing():
+            self._transport.write(format_message(fields).encode())
+
+    def wants(self, name: str, text: str) -> bool:
+        if not self.Authenticated or EVENT_CLASSES.get(name, 'call') not in self.Events:
+            return False
+        return not self.Filters or any(f.search(text) for f in self.Filters)
+
+    def write(self, text: str):
+        if not self._transport.is_closing():
+            self._transport.write(text.encode())
+
+    def close(self):
+        self._transport.close()
+
+
+class AmiSimulator:
+    """
+    Fake Asterisk manager interface. Originates ring and answer their extension, pager and master originates
+    join the conference of their group, message originates leave it again after message_duration seconds.
+    """
+    _logger = logging.getLogger('Jaguar-AmiSimulator')
+
+    Sessions: List[AmiSimulatorSession]
+    Conferences: Dict[str, Dict[str, str]]
+    Actions: int
+    Events: int
+
+    def __init__(self, user: str, secret: str, extensions: [str], response_delay: float = 0.0,
+                 answer_delay: float = 0.2, message_duration: float = 5.0):
+        self._user = user
+        self._secret = secret
+        self._extensions = extensions or ['3001']
+        self._response_delay = response_delay
+        self._answer_delay = answer_delay
+        self._message_duration = message_duration
+        self._server = None
+        self._ids = itertools.count(1)
+        self._queue_callers: List[str] = []
+        self._call_states: Dict[str, str] = {}
+        self.Sessions = []
+        # conference -> channel -> extension of every member
+        self.Conferences = {}
+        self.Actions = 0
+        self.Events = 0
+
+    async def start(self, host: str = '127.0.0.1', port: int = 5038) -> int:
+        """Listen on host:port, returns the port (useful with port 0)."""
+        self._server = await asyncio.get_running_loop().create_server(lambda: AmiSimulatorSession(self), host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        self._logger.info('AMI simulator listening on %s:%s with %s extensions', host, port, len(self._extensions))
+        return port
+
+    def close(self):
+        for session in list(self.Sessions):
+            session.close()
+        if self._server is not None:
+            self._server.close()
+
+    def statistics(self) -> Dict[str, int]:
+        return {'sessions': len(self.Sessions), 'actions': self.Actions, 'events': self.Events,
+                'conferences': len(self.Conferences)}
+
+    def broadcast(self, fields: Dict[str, object]):
+        """Send an event to every session whose event mask and filters let it through."""
+        event = {'Event': fields['Event'], 'Privilege': f'{EVENT_CLASSES.get(fields["Event"], "call")},all'}
+        event.update(fields)
+        text = format_message(event)
+        for session in self.Sessions:
+            if session.wants(event['Event'], text):
+                session.write(text)
+                self.Events += 1
+
+    def _channel(self, ext: str) -> str:
+        return f'PJSIP/{ext}-{next(self._ids):08x}'
+
+    # Actions
+
+    async def handle(self, session: AmiSimulatorSession, action: Dict[str, str]):
+        self.Actions += 1
+        name = action.get('Action', '').lower()
+        reply = {'Response': 'Success'}
+        if 'ActionID' in action:
+            reply['ActionID'] = action['ActionID']
+        if self._response_delay > 0 and name not in ('login', 'ping'):
+            await asyncio.sleep(self._response_delay)
+        if name == 'login':
+            self._login(session, action, reply)
+            return
+        if not session.Authenticated:
+            session.send(reply | {'Response': 'Error', 'Message': 'Permission denied'})
+            return
+        handler = getattr(self, f'_action_{name}', None)
+        if handler is None:
+            session.send(reply | {'Response': 'Error', 'Message': 'Invalid/unknown command'})
+            return
+        handler(session, action, reply)
+
+    def _login(self, session: AmiSimulatorSession, action: Dict[str, str], reply: Dict[str, str]):
+        if action.get('Username') != self._user or action.get('Secret') != self._secret:
+            session.send(reply | {'Response': 'Error', 'Message': 'Authentication failed'})
+            return
+        session.Authenticated = True
+        session.set_events(action.get('Events', 'on'))
+        session.send(reply | {'Message': 'Authentication accepted'})
+        if session.wants('FullyBooted', 'Event: FullyBooted'):
+            session.send({'Event': 'FullyBooted', 'Privilege': 'system,all', 'Status': 'Fully Booted'})
+
+    def _action_logoff(self, session: AmiSimulatorSession, action, reply):
+        session.send(reply | {'Response': 'Goodbye', 'Message': 'Thanks for all the fish.'})
+        session.close()
+
+    def _action_ping(self, session: AmiSimulatorSession, action, reply):
+        session.send(reply | {'Ping': 'Pong'})
+
+    def _action_events(self, session: AmiSimulatorSession, action, reply):
+        session.set_events(action.get('EventMask', 'off'))
+        session.send(reply | {'Events': 'On' if session.Events else 'Off'})
+
+    def _action_filter(self, session: AmiSimulatorSession, action, reply):
+        try:
+            session.Filters.append(re.compile(action.get('Filter', '')))
+        except re.error:
+            session.send(reply | {'Response': 'Error', 'Message': 'Filter Not Added'})
+            return
+        session.send(reply | {'Message': 'Filter Added Successfully'})
+
+    def _action_setvar(self, session: AmiSimulatorSession, action, reply):
+        session.send(reply | {'Message': 'Variable Set'})
+
+    def _action_redirect(self, session: AmiSimulatorSession, action, reply):
+        session.send(reply | {'Message': 'Redirect successful'})
+        channel = action.get('Channel', '')
+        self.broadcast({'Event': 'Newstate', 'Channel': channel, 'ChannelState': 6, 'ChannelStateDesc': 'Up'})
+
+    def _action_originate(self, session: AmiSimulatorSession, action, reply):
+        session.send(reply | {'Message': 'Originate successfully queued'})
+        asyncio.ensure_future(self._originate(action))
+
+    def _action_hangup(self, session: AmiSimulatorSession, action, reply):
+        pattern = action.get('Channel', '')
+        if len(pattern) > 1 and pattern.startswith('/') and pattern.endswith('/'):
+            match = re.compile(pattern[1:-1]).search
+        else:
+            match = pattern.__eq__
+        channels = [c for c in self._call_states if match(c)]
+        for channel in channels:
+            self._hangup(channel)
+        session.send(reply | {'Message': f'{len(channels)} channels hung up.'})
+
+    def _action_confbridgekick(self, session: AmiSimulatorSession, action, reply):
+        conference = action.get('Conference', '')
+        if conference not in self.Conferences:
+            session.send(reply | {'Response': 'Error', 'Message': 'No Conference by that name found.'})
+            return
+        session.send(reply | {'Message': 'User kicked'})
+        for channel in list(self.Conferences[conference]):
+            self._leave(conference, channel)
+
+    def _action_pjsipshowcontacts(self, session: AmiSimulatorSession, action, reply):
+        session.send(reply | {'EventList': 'start',
+                              'Message': 'A listing of Contacts follows, presented as ContactList events'})
+        for ext in self._extensions:
+            session.send({'Event': 'ContactList', 'ActionID': reply.get('ActionID', ''), 'Endpoint': ext,
+                          'Status': 'Reachable', 'ViaAddr': '127.0.0.1'})
+        session.send({'Event': 'ContactListComplete', 'ActionID': reply.get('ActionID', ''),
+                      'EventList': 'Complete', 'ListItems': len(self._extensions)})
+
+    def _action_confbridgelistrooms(self, session: AmiSimulatorSession, action, reply):
+        if not self.Conferences:
+            session.send(reply | {'Response': 'Error', 'Message': 'No active conferences.'})
+            return
+        session.send(reply | {'EventList': 'start', 'Message': 'Confbridge conferences will follow'})
+        for conference, members in self.Conferences.items():
+            session.send({'Event': 'ConfbridgeListRooms', 'ActionID': reply.get('ActionID', ''),
+                          'Conference': conference, 'Parties': len(members), 'Marked': 0, 'Locked': 'No'})
+        session.send({'Event': 'ConfbridgeListRoomsComplete', 'ActionID': reply.get('ActionID', ''),
+                      'EventList': 'Complete', 'ListItems': len(self.Conferences)})
+
+    # Calls and conferences
+
+    async def _originate(self, action: Dict[str, str]):
+        target = action.get('Channel', '')
+        variables = dict(v.split('=', 1) for v in action.get('Variable', '').split(',') if '=' in v)
+        channel = f'{target}-{next(self._ids):08x};1' if target.startswith('Local/') else self._channel(
+            target.split('/')[-1])
+        await asyncio.sleep(self._answer_delay)
+        self._call_states[channel] = 'Up'
+        self.broadcast({'Event': 'OriginateResponse', 'ActionID': action.get('ActionID', ''), 'Response': 'Success',
+                        'Channel': channel, 'Context': action.get('Context', ''), 'Exten': action.get('Exten', ''),
+                        'Reason': 4, 'Uniqueid': f'1700000000.{next(self._ids)}'})
+        if not target.startswith('Local/'):
+            self._ring(channel)
+            return
+        (grp, _, context) = target[6:].partition('@')
+        if context in ('Paging-ActivatePager', 'Paging-Master'):
+            self._join(grp, self._channel(variables.get('var1', '')))
+        elif context in ('Paging-app', 'Paging-autoapp'):
+            self._join(grp, channel[:-2] + ';2')
+            asyncio.get_running_loop().call_later(self._message_duration, self._hangup, channel)
+        elif context == 'Paging-Page':
+            for dest in action.get('Data', '').split(',')[0].split('&'):
+                self._ring(self._channel(dest.split('/')[-1]))
+            if 'PAGE_MESSAGE' in variables:
+                asyncio.get_running_loop().call_later(self._message_duration, self._hangup, channel)
+        elif context == 'CallGroup-Start':
+            self._ring(self._channel(variables.get('var1', '')))
+
+    def _ring(self, channel: str):
+        self._call_states[channel] = 'Ringing'
+        self.broadcast({'Event': 'Newstate', 'Channel': channel, 'ChannelState': 5, 'ChannelStateDesc': 'Ringing'})
+        asyncio.get_running_loop().call_later(self._answer_delay, self._answer, channel)
+
+    def _answer(self, channel: str):
+        if self._call_states.get(channel) == 'Ringing':
+            self._call_states[channel] = 'Up'
+            self.broadcast({'Event': 'Newstate', 'Channel': channel, 'ChannelState': 6, 'ChannelStateDesc': 'Up'})
+
+    def _hangup(self, channel: str):
+        if self._call_states.pop(channel, None) is None:
+            return
+        self.broadcast({'Event': 'Hangup', 'Channel': channel, 'Cause': 16, 'Cause-txt': 'Normal Clearing'})
+        if channel.startswith('Local/') and channel.endswith(';1'):
+            # The dialplan half of a message originate leaves the conference with it
+            other = channel[:-2] + ';2'
+            for conference, members in list(self.Conferences.items()):
+                if other in members:
+                    self._leave(conference, other)
+
+    def _join(self, conference: str, channel: str):
+        if conference not in self.Conferences:
+            self.Conferences[conference] = {}
+            self.broadcast({'Event': 'ConfbridgeStart', 'Conference': conference, 'BridgeName': conference,
+                            'BridgeNumChannels': 0})
+        members = self.Conferences[conference]
+        members[channel] = channel
+        self.broadcast({'Event': 'ConfbridgeJoin', 'Conference': conference, 'BridgeName': conference,
+                        'BridgeNumChannels': len(members), 'Channel': channel})
+
+    def _leave(self, conference: str, channel: str):
+        members = self.Conferences.get(conference, {})
+        if members.pop(channel, None) is None:
+            return
+        self.broadcast({'Event': 'ConfbridgeLeave', 'Conference': conference, 'BridgeName': conference,
+                        'BridgeNumChannels': len(members), 'Channel': channel})
+        if not members:
+            del self.Conferences[conference]
+            self.broadcast({'Event': 'ConfbridgeEnd', 'Conference': conference, 'BridgeName': conference,
+                            'BridgeNumChannels': 0})
+
+    # Event storms
+
+    def _storm_event(self, kind: str):
+        ext = random.choice(self._extensions)
+        if kind == 'call':
+            # Every extension cycles through ringing, answered and hung up
+            channel = next((c for c in self._call_states if c.startswith(f'PJSIP/{ext}-')), None)
+            if channel is None:
+                self._ring(self._channel(ext))
+            else:
+                self._hangup(channel)
+        elif kind == 'conference':
+            conference = str(random.randint(1, 5))
+            members = self.Conferences.get(conference)
+            if members and random.random() < 0.5:
+                self._leave(conference, random.choice(list(members)))
+            else:
+                self._join(conference, self._channel(ext))
+        elif kind == 'queue':
+            if self._queue_callers and random.random() < 0.5:
+                caller = self._queue_callers.pop(0)
+                event = random.choice(['QueueCallerLeave', 'QueueCallerAbandon'])
+            else:
+                caller = ext
+                self._queue_callers.append(caller)
+                event = 'QueueCallerJoin'
+            self.broadcast({'Event': event, 'Queue': 'Operators', 'CallerIDNum': caller,
+                            'Channel': self._channel(caller), 'Position': len(self._queue_callers), 'HoldTime': 3})
+        else:
+            self.broadcast({'Event': random.choice(['VarSet', 'RTCPSent']), 'Channel': self._channel(ext),
+                            'Variable': 'BRIDGEPEER', 'Value': ''})
+
+    async def storm(self, rates: Dict[str, float], duration: float = 0):
+        """
+        Randomized events at rates per second of each kind: call (Newstate/Hangup), conference
+        (Confbridge*), queue (Queue*) and noise (events Jaguar does not use). A duration of 0 runs forever.
+        """
+        tick = 0.01
+        owed = dict.fromkeys(rates, 0.0)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        while duration <= 0 or loop.time() - started < duration:
+            for kind, rate in rates.items():
+                owed[kind] += rate * tick
+                while owed[kind] >= 1:
+                    owed[kind] -= 1
+                    self._storm_event(kind)
+            await asyncio.sleep(tick)
+
+    async def play(self, filename: str, speed: float = 1.0):
+        """
+        Broadcast the events of a script: blocks of 'Key: Value' lines separated by an empty line,
+        an optional Delay header waits that many seconds (divided by speed) before its event.
+        """
+        with open(filename) as f:
+            blocks = f.read().replace(EOL, '\n').split('\n\n')
+        for block in blocks:
+            fields = {}
+            for line in block.splitlines():
+                key, sep, value = line.partition(':')
+                if sep and not line.startswith(';'):
+                    fields[key.strip()] = value.strip()
+            delay = float(fields.pop('Delay', 0))
+            if delay > 0 and speed > 0:
+                await asyncio.sleep(delay / speed)
+            if 'Event' in fields:
+                self.broadcast(fields)
+
+
+async def main(args):
+    config = configparser.ConfigParser()
+    config.optionxform = str
+    config.read(args.config)
+    simulator = AmiSimulator(config.get('SERVER', 'user', fallback='Jaguar'),
+                             config.get('SERVER', 'secret', fallback=''), read_extensions(args.stations),
+                             args.response_delay, args.answer_delay, args.message_duration)
+    await simulator.start(args.host, args.port)
+    tasks = []
+    rates = {'call': args.calls, 'conference': args.conferences, 'queue': args.queues, 'noise': args.noise}
+    if any(rates.values()):
+        tasks.append(asyncio.create_task(simulator.storm({k: v for k, v in rates.items() if v > 0}, args.duration)))
+    if args.script:
+        tasks.append(asyncio.create_task(simulator.play(args.script, args.speed)))
+    while True:
+        await asyncio.sleep(10)
+        simulator._logger.info('AMI simulator: %s', simulator.statistics())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(name)-23s]   %(levelname)-8s %(message)s',
+                        datefmt='%m-%d %H:%M:%S')
+    parser = argparse.ArgumentParser(description='Fake Asterisk AMI server for load and latency tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5038)
+    parser.add_argument('--config', default='Asterisk.conf', help='AMI user and secret are taken from [SERVER]')
+    parser.add_argument('--stations', default='Stations.conf', help='extensions that answer calls')
+    parser.add_argument('--calls', type=float, default=0, help='Newstate/Hangup events per second')
+    parser.add_argument('--conferences', type=float, default=0, help='Confbridge events per second')
+    parser.add_argument('--queues', type=float, default=0, help='Queue events per second')
+    parser.add_argument('--noise', type=float, default=0, help='events per second Jaguar does not use')
+    parser.add_argument('--duration', type=float, default=0, help='seconds of storm, 0 runs forever')
+    parser.add_argument('--script', help='file of scripted events to broadcast')
+    parser.add_argument('--speed', type=float, default=1.0, help='speed up factor of the script delays')
+    parser.add_argument('--response-delay', type=float, default=0.0, help='seconds before an action is answered')
+    parser.add_argument('--answer-delay', type=float, default=0.2, help='seconds until a phone answers')
+    parser.add_argument('--message-duration', type=float, default=5.0, help='seconds a paging message plays')
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Dict, List
+
+from panoramisk import Manager, Message
+
+# Upper bounds in seconds of the latency histogram buckets, slower actions fall into the last one
+LATENCY_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+
+class AmiActionStatistics:
+    """Latency histogram and outcome counters of one action type."""
+    Count: int
+    Failed: int
+    Timeouts: int
+
+    def __init__(self):
+        self.Count = 0
+        self.Failed = 0
+        self.Timeouts = 0
+        self._buckets: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._total = 0.0
+        self._max = 0.0
+
+    def add(self, latency: float):
+        self.Count += 1
+        self._total += latency
+        self._max = max(self._max, latency)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self._buckets[i] += 1
+                return
+        self._buckets[-1] += 1
+
+    def statistics(self) -> Dict[str, object]:
+        histogram = {f'<={bound}s': n for bound, n in zip(LATENCY_BUCKETS, self._buckets) if n}
+        if self._buckets[-1]:
+            histogram[f'>{LATENCY_BUCKETS[-1]}s'] = self._buckets[-1]
+        return {'count': self.Count, 'failed': self.Failed, 'timeouts': self.Timeouts,
+                'avg': round(self._total / self.Count, 4) if self.Count else 0.0, 'max': round(self._max, 4),
+                'histogram': histogram}
+
+
+class AmiActionTracker:
+    """
+    Sends AMI actions under an ActionID of its own and a deadline per action type, a stalled Asterisk
+    fails the action instead of blocking its caller. Latency and failures are recorded per action type,
+    async originates awaited to their OriginateResponse are recorded as OriginateResponse.
+    """
+    _logger = logging.getLogger('Jaguar-SoftSwitchServer')
+
+    def __init__(self, timeouts: Dict[str, float], default_timeout: float = 10):
+        self._timeouts = timeouts
+        self._default_timeout = default_timeout
+        self._ids = itertools.count(1)
+        self._actions: Dict[str, AmiActionStatistics] = {}
+
+    def timeout(self, name: str) -> float:
+        return self._timeouts.get(name, self._default_timeout)
+
+    async def send(self, manager: Manager, action: dict, complete: bool = False):
+        """
+        Send an action and wait for its response, or for the completion event of an async action when
+        complete is set. Raises asyncio.TimeoutError when the deadline of the action type passes.
+        """
+        name = action['Action'].strip()
+        if complete:
+            name = f'{name}Response'
+        action_id = f'jaguar-{name}-{next(self._ids)}'
+        action['ActionID'] = action_id
+        stats = self._actions.setdefault(name, AmiActionStatistics())
+        timeout = self.timeout(name)
+        started = time.perf_counter()
+        future = manager.send_action(action, None if complete else False)
+        try:
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            stats.Timeouts += 1
+            stats.Failed += 1
+            self._forget(manager, action_id)
+            self._logger.error('AMI action %s timed out after %ss', action_id, timeout)
+            raise
+        except asyncio.CancelledError:
+            self._forget(manager, action_id)
+            raise
+        except Exception:
+            stats.Failed += 1
+            raise
+        stats.add(time.perf_counter() - started)
+        last = result[-1] if isinstance(result, list) else result
+        if last.get('Response') not in Message.success_responses:
+            stats.Failed += 1
+            self._logger.warning('AMI action %s failed: %s', action_id, last.get('Message', last.get('Response')))
+        return result
+
+    def _forget(self, manager: Manager, action_id: str):
+        # The action would otherwise wait in the protocol for a response forever
+        if manager.protocol is not None:
+            manager.protocol.responses.pop(action_id, None)
+
+    def statistics(self) -> Dict[str, Dict[str, object]]:
+        return {name: stats.statistics() for name, stats in self._actions.items()}
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from panoramisk import Manager
+
+
+class AmiConnectionPool:
+    """
+    AMI sessions that only carry actions, next to the session that streams the events. A busy event stream
+    then does not delay the responses of control actions. Each session is filtered down to the
+    OriginateResponse events, so async originates still complete on the session they were sent on.
+    """
+    _logger = logging.getLogger('Jaguar-SoftSwitchServer')
+
+    def __init__(self, size: int, **config):
+        self._managers: List[Manager] = []
+        self._ready: List[Manager] = []
+        self._next = 0
+        for _ in range(size):
+            # Only the call class is streamed, it is narrowed to OriginateResponse after login
+            mngr = Manager(events='call', **config)
+            mngr.on_login = self._on_login
+            mngr.on_disconnect = self._on_disconnect
+            self._managers.append(mngr)
+
+    def __len__(self):
+        return len(self._managers)
+
+    async def connect(self):
+        await asyncio.gather(*[m.connect() for m in self._managers])
+
+    def close(self):
+        for mngr in self._managers:
+            mngr.close()
+
+    def manager(self) -> Optional[Manager]:
+        """The logged in session with the fewest actions in flight, None while no session is ready."""
+        if not self._ready:
+            return None
+        self._next = (self._next + 1) % len(self._ready)
+        # Start the search at a rotating position so that idle sessions are used in turn
+        candidates = self._ready[self._next:] + self._ready[:self._next]
+        return min(candidates, key=lambda m: len(m.protocol.responses))
+
+    def _on_login(self, mngr: Manager):
+        self._logger.info('AMI action session %s logged in', self._managers.index(mngr) + 1)
+        asyncio.ensure_future(self._send_filter(mngr))
+
+    async def _send_filter(self, mngr: Manager):
+        # Filters belong to the session, they are sent again after every (re)login
+        action = {'Action': 'Filter', 'Operation': 'Add', 'Filter': 'Event: OriginateResponse'}
+        result = await mngr.send_action(action, False)
+        if not result.success:
+            self._logger.error('AMI action session filter failed: %r', result)
+        if mngr not in self._ready:
+            self._ready.append(mngr)
+
+    def _on_disconnect(self, mngr: Manager, exc: Exception):
+        self._logger.warning('AMI action session %s disconnected: %s', self._managers.index(mngr) + 1, exc)
+        if mngr in self._ready:
+            self._ready.remove(mngr)
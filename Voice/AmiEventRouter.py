@@ -0,0 +1,115 @@
+import logging
+from importlib import metadata
+from typing import Dict, List, Tuple
+
+from panoramisk import Manager, Message, utils
+from panoramisk.ami_protocol import AMIProtocol
+
+from Voice.AmiRecorder import AmiRecorder
+
+# Events panoramisk itself depends on, they are never dropped
+_RESERVED_EVENTS = {'FullyBooted', 'Shutdown'}
+# AmiRoutedProtocol.data_received is a copy of AMIProtocol.data_received of this panoramisk version
+PANORAMISK_VERSION = '1.4'
+
+
+class AmiEventRouter:
+    """
+    Maps AMI event names to handlers. Every handler declares the fields it needs and is called
+    with their values in that order, events without a handler are dropped.
+    """
+    _logger = logging.getLogger('Jaguar-SoftSwitchServer')
+
+    Routed: int
+    Dropped: int
+
+    def __init__(self):
+        self._routes: Dict[str, Tuple[object, List[str]]] = {}
+        self.Routed = 0
+        self.Dropped = 0
+
+    def add(self, event: str, handler, fields: List[str]):
+        self._routes[event] = (handler, fields)
+
+    def events(self) -> List[str]:
+        return list(self._routes)
+
+    def skip(self, line: str) -> bool:
+        """Tell from the raw text whether an event can be dropped before it is parsed into a Message."""
+        if not line.startswith('Event: '):
+            return False
+        end = line.find(utils.EOL)
+        event = line[7:end] if end >= 0 else line[7:]
+        if event in self._routes or event in _RESERVED_EVENTS or 'ActionID: ' in line:
+            # Events carrying an ActionID may complete one of our own actions
+            return False
+        self.Dropped += 1
+        return True
+
+    async def dispatch(self, manager: Manager, message: Message) -> bool:
+        route = self._routes.get(message.get('Event'))
+        if route is None:
+            self.Dropped += 1
+            return False
+        self.Routed += 1
+        (handler, fields) = route
+        await handler(*[message.get(f, '') for f in fields])
+        return True
+
+    def statistics(self) -> Dict[str, int]:
+        return {'routed': self.Routed, 'dropped': self.Dropped}
+
+
+class AmiRoutedProtocol(AMIProtocol):
+    """
+    AMIProtocol that asks the router before parsing an event, unused events never become a Message.
+    With a recorder every event is also recorded as it arrived, the dropped ones included.
+    data_received is AMIProtocol.data_received of panoramisk 1.4 with the router and recorder added,
+    with any other panoramisk version the stock parser is used and nothing is skipped or recorded.
+    """
+    _logger = logging.getLogger('Jaguar-SoftSwitchServer')
+
+    def __init__(self, router: AmiEventRouter, recorder: AmiRecorder = None):
+        super().__init__()
+        self.router = router
+        self.recorder = recorder
+        self.routed = metadata.version('panoramisk') == PANORAMISK_VERSION
+        if not self.routed:
+            self._logger.warning('panoramisk %s is installed, AMI events are parsed without the router (needs %s)',
+                                 metadata.version('panoramisk'), PANORAMISK_VERSION)
+
+    def data_received(self, data):
+        if not self.routed:
+            super().data_received(data)
+            return
+        encoding = getattr(self, 'encoding', 'ascii')
+        data = data.decode(encoding, 'ignore')
+        if getattr(self.factory, 'save_stream', None):
+            stream = self.factory.save_stream
+            if hasattr(stream, 'write'):
+                stream.write(data.encode(encoding))
+            else:
+                with open(stream, 'a+') as fd:
+                    fd.write(data.encode(encoding))
+
+        if self.version is None:
+            if data.startswith('Asterisk Call Manager/'):
+                version, __, __ = data.partition(utils.EOL)
+                __, __, version = version.partition('/')
+                self.version = version.strip()
+                self.log.info("protocol version: '%s'", self.version)
+
+        if self.queue:
+            data = self.queue.popleft() + data
+        lines = data.split(utils.EOL + utils.EOL)
+        self.queue.append(lines.pop(-1))
+        for line in lines:
+            line = line.strip()
+            if self.recorder is not None and line.startswith('Event: '):
+                self.recorder.record(line)
+            if self.router.skip(line):
+                continue
+            message = Message.from_line(line)
+            if message is None:
+                continue
+            self.handle_message(message)
@@ -0,0 +1,36 @@
+import json
+import time
+from typing import Iterator, Tuple
+
+
+class AmiRecorder:
+    """
+    Appends every AMI event to a file as one JSON line [time, text], time in seconds since the epoch
+    and text the raw event as Asterisk sent it. read_recording() gives the events back for a replay.
+    """
+    Filename: str
+    Recorded: int
+
+    def __init__(self, filename: str):
+        self.Filename = filename
+        self._file = open(filename, 'a', encoding='utf8', buffering=1 << 16)
+        self.Recorded = 0
+
+    def record(self, text: str):
+        self._file.write(json.dumps([round(time.time(), 3), text], separators=(',', ':')))
+        self._file.write('\n')
+        self.Recorded += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def read_recording(filename: str) -> Iterator[Tuple[float, str]]:
+    with open(filename, encoding='utf8') as f:
+        for line in f:
+            if line.strip():
+                (t, text) = json.loads(line)
+                yield t, text
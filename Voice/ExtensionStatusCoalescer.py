@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from typing import Dict, Tuple
+
+from Voice.ExtensionStatus import ExtensionStatus
+
+
+class ExtensionStatusCoalescer:
+    """
+    Collects extension status changes for a short window and forwards only the latest
+    state of every extension. A single call fires several Newstate/Hangup events within
+    a few milliseconds, each of them would otherwise become its own OPC UA write.
+    """
+    _logger = logging.getLogger('Jaguar-SoftSwitchServer')
+
+    Received: int
+    Dispatched: int
+    Suppressed: int
+
+    def __init__(self, window: float, dispatch):
+        self._window = window
+        self._dispatch = dispatch
+        self._pending: Dict[str, Tuple[ExtensionStatus, str]] = {}
+        self._flush_task = None
+        self.Received = 0
+        self.Dispatched = 0
+        self.Suppressed = 0
+
+    async def submit(self, extension: str, status: ExtensionStatus, chanel: str):
+        self.Received += 1
+        if self._window <= 0:
+            self.Dispatched += 1
+            await self._dispatch(extension, status, chanel)
+            return
+        if extension in self._pending:
+            self.Suppressed += 1
+        self._pending[extension] = (status, chanel)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def drain(self):
+        """Wait until every status submitted so far is dispatched."""
+        task = self._flush_task
+        if task is not None:
+            await asyncio.shield(task)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self._window)
+        pending = self._pending
+        self._pending = {}
+        self._flush_task = None
+        self.Dispatched += len(pending)
+        results = await asyncio.gather(*[self._dispatch(ext, status, chanel)
+                                         for ext, (status, chanel) in pending.items()], return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self._logger.error('Extension status dispatch failed: %r', result)
+
+    def statistics(self) -> Dict[str, int]:
+        return {'received': self.Received, 'dispatched': self.Dispatched, 'suppressed': self.Suppressed}
@@ -1,31 +1,34 @@
 import asyncio
 import configparser
+import functools
 import logging
 import string
+import time
+from typing import Dict
+
 from panoramisk import Manager, Message
+from Voice.AmiActionTracker import AmiActionTracker
+from Voice.AmiConnectionPool import AmiConnectionPool
+from Voice.AmiEventRouter import AmiEventRouter, AmiRoutedProtocol
+from Voice.AmiRecorder import AmiRecorder
 from Voice.ExtensionStatus import ExtensionStatus
+from Voice.ExtensionStatusCoalescer import ExtensionStatusCoalescer
+from Voice.RateLimiter import TokenBucket
 
 
 def on_connect(mngr: Manager):
-    logging.info(
-        'Connected to %s:%s AMI socket successfully' %
-        (mngr.config['host'], mngr.config['port'])
-    )
+    logging.info('Connected to %s:%s AMI socket successfully', mngr.config['host'], mngr.config['port'])
 
 
 def on_login(mngr: Manager):
-    logging.info(
-        'Connected user:%s to AMI %s:%s successfully' %
-        (mngr.config['username'], mngr.config['host'], mngr.config['port'])
-    )
+    logging.info('Connected user:%s to AMI %s:%s successfully', mngr.config['username'], mngr.config['host'],
+                 mngr.config['port'])
 
 
 def on_disconnect(mngr: Manager, exc: Exception):
-    logging.info(
-        'Disconnect user:%s from AMI %s:%s' %
-        (mngr.config['username'], mngr.config['host'], mngr.config['port'])
-    )
-    logging.debug(str(exc))
+    logging.info('Disconnect user:%s from AMI %s:%s', mngr.config['username'], mngr.config['host'],
+                 mngr.config['port'])
+    logging.debug('%s', exc)
 
 
 async def on_startup(mngr: Manager):
@@ -35,9 +38,26 @@ async def on_startup(mngr: Manager):
 
 async def on_shutdown(mngr: Manager):
     await asyncio.sleep(0.1)
-    logging.info(
-        'Shutdown AMI connection on %s:%s' % (mngr.config['host'], mngr.config['port'])
-    )
+    logging.info('Shutdown AMI connection on %s:%s', mngr.config['host'], mngr.config['port'])
+
+
+def originate_result(result) -> str:
+    """Response of an originate, async ones end with the Response of their OriginateResponse event."""
+    if isinstance(result, list):
+        result = result[-1]
+    return result.get('Response', '')
+
+
+class PageGroup:
+    """A paging group served by Asterisk Page(), its destinations wait for the master or a message."""
+    Extensions: [str]
+    Source: str
+    Running: bool
+
+    def __init__(self, extensions: [str]):
+        self.Extensions = extensions
+        self.Source = ''
+        self.Running = False
 
 
 def get_channel_extension(channel: str):
@@ -48,6 +68,9 @@ def get_channel_extension(channel: str):
     return g[1].split("-")[0]
 
 
+PAGING_MODES = ['Live', 'Manual', 'SemiAuto', 'Automatic']
+
+
 class SoftSwitchServer:
     _logger = logging.getLogger('Jaguar-SoftSwitchServer')
     _manager: Manager = None
@@ -68,63 +91,176 @@ class SoftSwitchServer:
         self._on_status_changed_subscribers = set()
         self._on_conference_status_changed_subscribers = set()
         self._on_queue_caller_status_changed_subscribers = set()
+        self._status_coalescer = ExtensionStatusCoalescer(
+            self._config.getfloat('Events', 'StatusCoalesceWindow', fallback=0.02), self._dispatch_extension_status)
+        self._statistics_interval = self._config.getint('Events', 'StatisticsInterval', fallback=60)
+        self._router = AmiEventRouter()
+        self._recorder: AmiRecorder = None
+        self._event_mask = self._config.get('Events', 'EventMask', fallback='')
+        self._event_filter = [x.strip() for x in self._config.get('Events', 'Filter', fallback='').split(',')
+                              if x.strip()]
+        # [Actions] <Action>Timeout overrides Timeout for one action type
+        timeouts = {}
+        if self._config.has_section('Actions'):
+            timeouts = {k[:-7]: float(v) for k, v in self._config['Actions'].items()
+                        if k.endswith('Timeout') and k != 'Timeout'}
+        self._pool: AmiConnectionPool = None
+        self._action_sessions = self._config.getint('Connections', 'ActionSessions', fallback=0)
+        pooled = self._config.get('Connections', 'PooledActions', fallback='Originate,Redirect,Setvar,ConfbridgeKick')
+        self._pooled_actions = {x.strip() for x in pooled.split(',') if x.strip()}
+        self._actions = AmiActionTracker(timeouts, self._config.getfloat('Actions', 'Timeout', fallback=10))
+        # Pager activations are sent together, bounded in number and rate to protect Asterisk
+        self._activate_slots = asyncio.Semaphore(max(self._config.getint('Paging', 'ActivateConcurrency',
+                                                                         fallback=10), 1))
+        self._activate_rate = TokenBucket(self._config.getfloat('Paging', 'ActivateRate', fallback=50),
+                                          self._config.getint('Paging', 'ActivateBurst', fallback=10))
+        # Call group members are originated through a token bucket, each holds a slot until it is answered
+        self._call_group_slots = asyncio.Semaphore(max(self._config.getint('CallGroup', 'Concurrency',
+                                                                           fallback=20), 1))
+        self._call_group_rate = TokenBucket(self._config.getfloat('CallGroup', 'Rate', fallback=5),
+                                            self._config.getint('CallGroup', 'Burst', fallback=5))
+        self._paging_backends = {mode: self._config.get('Paging', f'{mode}Backend', fallback='ConfBridge')
+                                 for mode in PAGING_MODES}
+        self._page_options = self._config.get('Paging', 'PageOptions', fallback='')
+        self._page_groups: Dict[str, PageGroup] = {}
 
     def init_server(self):
         self._host = self._server_config['host']
         self._port = self._server_config['port']
         self._user = self._server_config['user']
         self._secret = self._server_config['secret']
-        self._logger.info(f'Asterisk Manager {self._host}:{self._port} ({self._user}:{self._secret})')
+        self._logger.info('Asterisk Manager %s:%s (%s)', self._host, self._port, self._user)
+        record = self._config.get('Events', 'Record', fallback='')
+        if record:
+            self._logger.info('Recording AMI events to %s', record)
+            self._recorder = AmiRecorder(record)
         self._manager = Manager(host=self._host, port=self._port,
-                                username=self._user, secret=self._secret)
+                                username=self._user, secret=self._secret,
+                                protocol_factory=functools.partial(AmiRoutedProtocol, self._router, self._recorder))
+        if self._action_sessions > 0:
+            self._logger.info('Control actions use %s dedicated AMI sessions', self._action_sessions)
+            self._pool = AmiConnectionPool(self._action_sessions, host=self._host, port=self._port,
+                                           username=self._user, secret=self._secret)
         self.__init_events()
 
-    async def universal_callback(self, manager: Manager, message: Message):
-        # if message.Event != 'ChallengeSent' or message.Event != 'SuccessfulAuth' or message.Event != 'RTCPSent':
-        #   self._logger.info(f'--*************---Event: {message.Event}  Num:{message.CallerIDNum}')
-        if message.Event == 'PeerStatus':
-            self._logger.info('%s state changed to : %s' % (message.Peer, message.PeerStatus))
-            await self._extension_peer_status_changed_dispatch(str(message.Peer).split("/")[1],
-                                                               message.PeerStatus)
-        elif message.Event == 'Newstate':
-            # self._logger.info(message)
-            self._logger.info('%s state changed to : %s' % (message.Channel, message.ChannelStateDesc))
-            await self._extension_status_changed_dispatch(get_channel_extension(message.Channel),
-                                                          message.ChannelStateDesc, message.Channel)
-        elif message.Event == 'Hangup':
-            # self._logger.info(message)
-            self._logger.info('%s state changed to : Hang up (%s)' % (message.Channel, message.Cause))
-            await self._extension_status_changed_dispatch(get_channel_extension(message.Channel), 'Hangup', '')
-
-        elif message.Event == 'DialState':
-            self._logger.info('DialState: %s' % message)
-
-        elif message.Event == 'ContactListComplete':
-            self._logger.info(message)
-
-        elif message.Event == 'ContactList':
-            self._logger.info('%s is %s (ip:%s)' % (message.Endpoint, message.Status, message.ViaAddr))
-            await self._extension_peer_status_changed_dispatch(message.Endpoint, message.Status)
-
-        elif message.Event == 'ContactListComplete':
-            self._logger.info(message)
-
     def __init_events(self):
         self._manager.on_connect = on_connect
         self._manager.on_disconnect = on_disconnect
-        self._manager.on_login = on_login
-        self._manager.register_event('*', self.universal_callback)
-        self._manager.register_event('Confbridge*', self._conference_status_changed)
-        self._manager.register_event('Queue*', self._queue_status_changed)
+        self._manager.on_login = self._on_login
+        self._router.add('PeerStatus', self._on_peer_status, ['Peer', 'PeerStatus'])
+        self._router.add('Newstate', self._on_newstate, ['Channel', 'ChannelStateDesc'])
+        self._router.add('Hangup', self._on_hangup, ['Channel', 'Cause'])
+        self._router.add('DialState', self._on_dial_state, ['Channel', 'DestChannel', 'DialStatus'])
+        self._router.add('ContactList', self._on_contact_list, ['Endpoint', 'Status', 'ViaAddr'])
+        self._router.add('ContactListComplete', self._on_contact_list_complete, ['ListItems'])
+        for event in ['ConfbridgeStart', 'ConfbridgeEnd', 'ConfbridgeJoin', 'ConfbridgeLeave', 'ConfbridgeListRooms']:
+            self._router.add(event, self._conference_status_changed,
+                             ['Event', 'BridgeName', 'BridgeNumChannels', 'Conference', 'Channel', 'Parties'])
+        for event in ['QueueCallerJoin', 'QueueCallerLeave', 'QueueCallerAbandon', 'QueueMemberStatus']:
+            self._router.add(event, self._queue_status_changed,
+                             ['Event', 'CallerIDNum', 'Channel', 'Position', 'HoldTime', 'Interface', 'Status'])
+        # One catch-all pattern and a dict lookup, panoramisk would try a regex per registered pattern
+        self._manager.register_event('*', self._router.dispatch)
+
+    async def _on_peer_status(self, peer: str, peer_status: str):
+        self._logger.info('%s state changed to : %s', peer, peer_status)
+        await self._extension_peer_status_changed_dispatch(peer.split("/")[1], peer_status)
+
+    async def _on_newstate(self, channel: str, state: str):
+        self._logger.info('%s state changed to : %s', channel, state)
+        await self._extension_status_changed_dispatch(get_channel_extension(channel), state, channel)
+
+    async def _on_hangup(self, channel: str, cause: str):
+        if channel.startswith('Local/') and '@Paging-Page-' in channel and channel.endswith(';1'):
+            await self._on_page_hangup(channel[6:channel.index('@')])
+        self._logger.info('%s state changed to : Hang up (%s)', channel, cause)
+        await self._extension_status_changed_dispatch(get_channel_extension(channel), 'Hangup', '')
+
+    async def _on_dial_state(self, channel: str, destination: str, status: str):
+        self._logger.info('DialState: %s -> %s %s', channel, destination, status)
+
+    async def _on_contact_list(self, endpoint: str, status: str, address: str):
+        self._logger.info('%s is %s (ip:%s)', endpoint, status, address)
+        await self._extension_peer_status_changed_dispatch(endpoint, status)
+
+    async def _on_contact_list_complete(self, items: str):
+        self._logger.info('Contact list complete: %s contacts', items)
+
+    def _on_login(self, mngr: Manager):
+        on_login(mngr)
+        # Filters belong to the AMI session, they are sent again after every (re)login
+        asyncio.ensure_future(self._send_event_filters())
+
+    async def _send_event_filters(self):
+        """Ask Asterisk to stream only the event classes and events Jaguar consumes."""
+        actions = []
+        if self._event_mask:
+            actions.append({'Action': 'Events', 'EventMask': self._event_mask})
+        for event in self._event_filter:
+            actions.append({'Action': 'Filter', 'Operation': 'Add', 'Filter': f'Event: {event}'})
+        if not actions:
+            return
+        results = await asyncio.gather(*[self._send_action(a) for a in actions],
+                                       return_exceptions=True)
+        for action, result in zip(actions, results):
+            if isinstance(result, Exception) or not result.success:
+                self._logger.error('AMI %s action failed: %r', action['Action'], result)
+        self._logger.info('AMI event mask "%s" and %s event filters are active', self._event_mask,
+                          len(self._event_filter))
+
+    async def connect(self):
+        await self._manager.connect()
+        if self._pool is not None:
+            await self._pool.connect()
 
     async def start(self):
-        await self._manager.connect()
+        await self.connect()
         await self.get_contacts()
+        elapsed = 0
         while self._alive:
             await asyncio.sleep(1)
+            elapsed += 1
+            if self._recorder is not None:
+                self._recorder.flush()
+            if self._statistics_interval > 0 and elapsed % self._statistics_interval == 0:
+                self.log_statistics()
+
+    def log_statistics(self):
+        self._logger.info('Extension status events: %s', self._status_coalescer.statistics())
+        self._logger.info('AMI events: %s', self._router.statistics())
+        if self._recorder is not None:
+            self._logger.info('AMI events recorded to %s: %s', self._recorder.Filename, self._recorder.Recorded)
+        for name, stats in self._actions.statistics().items():
+            self._logger.info('AMI %s actions: %s', name, stats)
+
+    async def replay_event(self, text: str) -> bool:
+        """
+        Handle a recorded event as if it came from the AMI socket. Returns once the changes it causes are
+        dispatched to the subscribers, False for an event that is dropped.
+        """
+        if self._router.skip(text):
+            return False
+        message = Message.from_line(text)
+        if message is None:
+            return False
+        if not await self._router.dispatch(self._manager, message):
+            return False
+        await self._status_coalescer.drain()
+        return True
+
+    def action_statistics(self):
+        return self._actions.statistics()
+
+    def _send_action(self, action: dict, complete: bool = False):
+        """Send an AMI action with the deadline of its type, complete waits for the end of an async action."""
+        mngr = None
+        if self._pool is not None and action['Action'].strip() in self._pooled_actions:
+            mngr = self._pool.manager()
+        # The event session carries every other action, and the pooled ones while no action session is up
+        return self._actions.send(mngr or self._manager, action, complete)
 
     async def originate(self, ext: string):
-        self._logger.info('originating call to %s' % ext)
+        self._logger.info('originating call to %s', ext)
         action = {
             'Action': 'Originate',
             'Channel': 'PJSIP/%s' % ext,
@@ -136,10 +272,10 @@ class SoftSwitchServer:
             'Priority': 1,
             'Async': True
         }
-        a: Message = await self._manager.send_action(action, False)
-        self._logger.info('action status: %s' % str(a.success))
-        self._logger.info('action id is: %s' % a.action_id)
-        self._logger.info('end of originating call to %s' % ext)
+        a: Message = await self._send_action(action)
+        self._logger.info('action status: %s', a.success)
+        self._logger.info('action id is: %s', a.action_id)
+        self._logger.info('end of originating call to %s', ext)
 
     async def redirect(self, channel: string, to):
         self._logger.info('redirecting  channel  %s to %s', channel, to)
@@ -154,9 +290,9 @@ class SoftSwitchServer:
             'Priority': 1,
             'Async': True
         }
-        a: Message = await self._manager.send_action(action, False)
-        self._logger.info('action status: %s' % str(a.success))
-        self._logger.info('end of redirecting channel %s' % channel)
+        a: Message = await self._send_action(action)
+        self._logger.info('action status: %s', a.success)
+        self._logger.info('end of redirecting channel %s', channel)
 
     async def pickup(self, channel: string, to):
         self._logger.info('("Pickup Call")  channel  %s to %s', channel, to)
@@ -171,32 +307,61 @@ class SoftSwitchServer:
             'Priority': 1,
             'Async': True,
         }
-        a: Message = await self._manager.send_action(action, False)
-        self._logger.info('action status: %s' % str(a.success))
-        self._logger.info('end of redirecting channel %s' % channel)
-
-    async def callGroup(self, extensions: [str]):
+        a: Message = await self._send_action(action)
+        self._logger.info('action status: %s', a.success)
+        self._logger.info('end of redirecting channel %s', channel)
+
+    async def callGroup(self, extensions: [str], on_progress=None) -> Dict[str, str]:
+        """
+        Call every member of a call group, returns the final state of each extension.
+        A member goes from Queued to Dialing and ends Connected or Failed with its OriginateResponse,
+        on_progress(states) is awaited after every change.
+        """
         self._logger.info('Starting Calling Group ...')
-        for ext in extensions:
+        states = {ext: 'Queued' for ext in extensions}
+
+        async def update(ext: str, state: str):
+            states[ext] = state
+            if on_progress is not None:
+                await on_progress(states)
+
+        if on_progress is not None:
+            await on_progress(states)
+        started = time.perf_counter()
+        await asyncio.gather(*[self._call_group_member(ext, update) for ext in extensions])
+        failed = [ext for ext, state in states.items() if state != 'Connected']
+        self._logger.info('Finishing Calling Group! %s of %s connected in %.3fs', len(states) - len(failed),
+                          len(states), time.perf_counter() - started)
+        if failed:
+            self._logger.error('Calling Group members %s failed', failed)
+        return states
+
+    async def _call_group_member(self, ext: str, update):
+        action = {
+            'Action': 'Originate',
+            'Channel': 'Local/1@CallGroup-Start',
+            'WaitTime': 1,
+            'CallerID': 'Call Group',
+            'Exten': '1',
+            'Timeout ': 30,
+            'Context': 'CallGroup-Call',
+            'Priority': 1,
+            'Async': True,
+            'Variable': 'var1=%s' % ext
+        }
+        async with self._call_group_slots:
+            await self._call_group_rate.acquire()
             self._logger.info('Start Call to %s', ext)
-            action = {
-                'Action': 'Originate',
-                'Channel': 'Local/1@CallGroup-Start',
-                'WaitTime': 1,
-                'CallerID': 'Call Group',
-                'Exten': '1',
-                'Timeout ': 30,
-                'Context': 'CallGroup-Call',
-                'Priority': 1,
-                'Async': True,
-                'Variable': 'var1=%s' % ext
-            }
-            a: Message = await self._manager.send_action(action, False)
-            self._logger.info('action status: %s' % str(a))
-            # self._logger.info('action status: %s' % str(a.success))
-            # self._logger.info('action id is: %s' % a.action_id)
-            self._logger.info('Finishing Calling Group!')
-            await asyncio.sleep(1)
+            await update(ext, 'Dialing')
+            try:
+                result = await self._send_action(action, True)
+            except Exception as e:
+                self._logger.error('Call to %s failed: %r', ext, e)
+                await update(ext, 'Failed')
+                return
+        response = originate_result(result)
+        self._logger.info('Call to %s: %s', ext, response)
+        await update(ext, 'Connected' if response == 'Success' else 'Failed')
 
     async def setvar(self, name, value):
         self._logger.info('Setting Global Variable %s to %s', name, value)
@@ -205,39 +370,72 @@ class SoftSwitchServer:
             'Variable': name,
             'Value': value,
         }
-        a: Message = await self._manager.send_action(action, False)
-        self._logger.info('action status: %s' % str(a.success))
-
-    async def paging_activate_pager(self, extensions: [str], grp):
+        a: Message = await self._send_action(action)
+        self._logger.info('action status: %s', a.success)
+
+    def paging_backend(self, mode: str) -> str:
+        return self._paging_backends.get(mode, 'ConfBridge')
+
+    async def paging_activate_pager(self, extensions: [str], grp, mode: str = 'Manual') -> Dict[str, bool]:
+        """
+        Originate the pagers of a group concurrently, returns whether Asterisk accepted each extension.
+        With the Page backend the pagers are only kept, they are called once the master or message is started.
+        """
+        if self.paging_backend(mode) == 'Page':
+            return await self._page_stage(extensions, grp)
+        self._page_groups.pop(str(grp), None)
         self._logger.info('Activating Paging For Group: %s', grp)
-        for ext in extensions:
-            self._logger.info('Activating Pager %s', ext)
-            action = {
-                'Action': 'Originate',
-                'Channel': f'Local/{grp}@Paging-ActivatePager',
-                'WaitTime': 1,
-                'CallerID': 'Paging...',
-                'Timeout ': 2,
-                'Async': True,
-                'Variable': 'var1=%s' % ext
-            }
-            a: Message = await self._manager.send_action(action, False)
-            self._logger.info(a)
-        self._logger.info('Activating Finished For Group: %s', grp)
+        started = time.perf_counter()
+        results = await asyncio.gather(*[self._activate_pager(ext, grp) for ext in extensions])
+        report = dict(zip(extensions, results))
+        failed = [ext for ext, ok in report.items() if not ok]
+        self._logger.info('Activating Finished For Group: %s, %s of %s pagers in %.3fs', grp,
+                          len(report) - len(failed), len(report), time.perf_counter() - started)
+        if failed:
+            self._logger.error('Activating pagers %s of group %s failed', failed, grp)
+        return report
+
+    async def _activate_pager(self, ext: str, grp) -> bool:
+        action = {
+            'Action': 'Originate',
+            'Channel': f'Local/{grp}@Paging-ActivatePager',
+            'WaitTime': 1,
+            'CallerID': 'Paging...',
+            'Timeout ': 2,
+            'Async': True,
+            'Variable': 'var1=%s' % ext
+        }
+        async with self._activate_slots:
+            await self._activate_rate.acquire()
+            started = time.perf_counter()
+            try:
+                a: Message = await self._send_action(action)
+            except Exception as e:
+                self._logger.error('Activating Pager %s failed: %r', ext, e)
+                return False
+            self._logger.info('Activating Pager %s: %s (%.3fs)', ext, a.get('Response'),
+                              time.perf_counter() - started)
+            return a.success
 
     async def paging_deactivate_pager(self, grp):
         self._logger.info('stopping Paging for %s', grp)
+        if str(grp) in self._page_groups:
+            await self._page_stop(grp)
+            return
         action = {
             'Action': 'ConfbridgeKick',
             'Conference': grp,
             'Channel': 'all',
             'Async': True,
         }
-        a: Message = await self._manager.send_action(action, False)
+        a: Message = await self._send_action(action)
         self._logger.info('End of Stopping Paging %s', grp)
 
     async def paging_active_master(self, extension, grp):
         self._logger.info('Activating Operator Station | %s', extension)
+        if str(grp) in self._page_groups:
+            await self._page_start(grp, '', f'PAGE_MASTER={extension}')
+            return
         action = {
             'Action': 'Originate',
             'Channel': f'Local/{grp}@Paging-Master',
@@ -246,7 +444,7 @@ class SoftSwitchServer:
             'Async': True,
             'Variable': 'var1=%s' % extension
         }
-        await self._manager.send_action(action, False)
+        await self._send_action(action)
         self._logger.info('Activating Operator Station has been finished')
 
     async def paging_live_test(self):
@@ -261,13 +459,16 @@ class SoftSwitchServer:
                     '-Recorded-2&tt-weasels',
             'Async': True
         }
-        a: Message = await self._manager.send_action(action, False)
-        self._logger.info('action status: %s' % str(a.success))
-        self._logger.info('action id is: %s' % a.action_id)
+        a: Message = await self._send_action(action)
+        self._logger.info('action status: %s', a.success)
+        self._logger.info('action id is: %s', a.action_id)
         self._logger.info('end of Live Paging')
 
     async def paging_broadcast_message(self, grp, message: str, is_admin: bool = False):
         self._logger.info('Start broadcast message ...')
+        if str(grp) in self._page_groups:
+            await self._page_start(grp, 'Paging-app', f'PAGE_MESSAGE={message}')
+            return
         action = {
             'Action': 'Originate',
             'Channel': f'Local/{grp}@Paging-app',
@@ -278,11 +479,14 @@ class SoftSwitchServer:
             'Async': True,
             'Variable': 'is_admin=%s' % is_admin
         }
-        await self._manager.send_action(action, False)
+        await self._send_action(action)
         self._logger.info('End of message broadcasting')
 
     async def paging_automatic_message(self, grp, message: str):
         self._logger.info('Start Automatic Paging For %s', grp)
+        if str(grp) in self._page_groups:
+            await self._page_start(grp, 'Paging-autoapp', f'PAGE_MESSAGE={message}')
+            return
         action = {
             'Action': 'Originate',
             'Channel': f'Local/{grp}@Paging-autoapp',
@@ -292,22 +496,76 @@ class SoftSwitchServer:
             'Data': '%s' % message,
             'Async': True
         }
-        await self._manager.send_action(action, False)
+        await self._send_action(action)
         self._logger.info('End of message automatic broadcasting')
 
+    async def _page_stage(self, extensions: [str], grp) -> Dict[str, bool]:
+        self._logger.info('Paging Group %s uses Page() for %s', grp, extensions)
+        self._page_groups[str(grp)] = PageGroup(list(extensions))
+        # Reported like a conference start, Jaguar tracks both backends the same way
+        await self._dispatch_conference_status('Start', str(len(extensions)), str(grp), '')
+        return {ext: True for ext in extensions}
+
+    async def _page_start(self, grp, source: str, variable: str):
+        """One origination of Page() calls every destination, the Paging-Page context plays the source."""
+        group = self._page_groups[str(grp)]
+        if not group.Extensions:
+            self._logger.warning('Paging Group %s has no destinations', grp)
+            return
+        action = {
+            'Action': 'Originate',
+            'Channel': f'Local/{grp}@Paging-Page',
+            'CallerID': 'Paging...',
+            'Application': 'Page',
+            'Data': '&'.join(f'PJSIP/{ext}' for ext in group.Extensions) + f',{self._page_options}',
+            'Async': True,
+            'Variable': variable
+        }
+        group.Source = source
+        group.Running = True
+        a: Message = await self._send_action(action)
+        self._logger.info('Page() for Group %s to %s destinations: %s', grp, len(group.Extensions),
+                          a.get('Response'))
+        if not a.success:
+            group.Running = False
+
+    async def _page_stop(self, grp):
+        group = self._page_groups.pop(str(grp))
+        if group.Running:
+            action = {
+                'Action': 'Hangup',
+                'Channel': f'/^Local/{grp}@Paging-Page-/',
+            }
+            a: Message = await self._send_action(action)
+            self._logger.info('Page() for Group %s hung up: %s', grp, a.get('Response'))
+        await self._dispatch_conference_status('End', '0', str(grp), '')
+
+    async def _on_page_hangup(self, grp: str):
+        group = self._page_groups.get(grp)
+        if group is None or not group.Running:
+            return
+        group.Running = False
+        # The source leaving ends a message like it does in a conference
+        await self._dispatch_conference_status('Leave', '0', grp, group.Source)
+
     async def paging_get_active(self):
         self._logger.info('Get Active Paging Group')
         action = {
             'Action': ' ConfbridgeListRooms',
             'Async': True,
         }
-        a: Message = await self._manager.send_action(action, False)
+        a: Message = await self._send_action(action)
         self._logger.info('End of Getting Active Paging Group')
 
     async def get_contacts(self):
         self._logger.info('get contact status')
-        a: Message = await self._manager.send_action({'Action': 'PJSIPShowContacts'}, False)
-        self._logger.info('get contact status : %s' % str(a.success))
+        try:
+            a: Message = await self._send_action({'Action': 'PJSIPShowContacts'})
+        except asyncio.TimeoutError:
+            # Stations still report their state with later PeerStatus events, startup goes on without the list
+            self._logger.error('get contact status timed out')
+            return
+        self._logger.info('get contact status : %s', a.success)
 
     def on_extension_status_changed(self, call_back):
         self._on_status_changed_subscribers.add(call_back)
@@ -329,6 +587,9 @@ class SoftSwitchServer:
             case _:
                 status = ExtensionStatus.OnHook
 
+        await self._status_coalescer.submit(channel, status, chanel)
+
+    async def _dispatch_extension_status(self, channel: string, status: ExtensionStatus, chanel):
         for callback in self._on_status_changed_subscribers:
             await callback(channel, status, chanel)
 
@@ -341,76 +602,65 @@ class SoftSwitchServer:
             case _:
                 status = ExtensionStatus.UnReachable
 
-        for callback in self._on_status_changed_subscribers:
-            await callback(channel, status, '')
+        await self._status_coalescer.submit(channel, status, '')
 
-    async def _conference_status_changed(self, manager: Manager, message: Message):
-
-        num = message.BridgeNumChannels
+    async def _conference_status_changed(self, event_name: str, bridge: str, num: str, conference: str,
+                                         chanel: str, parties: str):
         channel = ''
-        match message.Event:
+        match event_name:
             case 'ConfbridgeStart':
                 self._logger.info('Conf Bridge Info (Start): Bridge %s Channels: %s Conference:%s',
-                                  message.BridgeName, num, message.Conference)
+                                  bridge, num, conference)
                 event = 'Start'
             case 'ConfbridgeEnd':
                 self._logger.info('Conf Bridge Info (End): Bridge %s Channels: %s Conference:%s',
-                                  message.BridgeName, num, message.Conference)
+                                  bridge, num, conference)
                 event = 'End'
             case 'ConfbridgeJoin':
-                channel = get_channel_extension(message.Channel)
+                channel = get_channel_extension(chanel)
                 self._logger.info('Conf Bridge Info (Join): channel %s joined to %s Channels: %s Conference:%s',
-                                  channel, message.BridgeName, num, message.Conference)
+                                  channel, bridge, num, conference)
                 event = 'Join'
 
             case 'ConfbridgeLeave':
-                channel = get_channel_extension(message.Channel)
+                channel = get_channel_extension(chanel)
                 self._logger.info('Conf Bridge Info (Leave): channel %s Leave %s  Channels: %s Conference:%s',
-                                  channel, message.BridgeName, num, message.Conference)
+                                  channel, bridge, num, conference)
                 event = 'Leave'
 
             case 'ConfbridgeListRooms':
-                self._logger.info('Conf Bridge Info (List): Conference:%s - Parties:%s', message.Conference,
-                                  message.Parties)
-                num = message.Parties
+                self._logger.info('Conf Bridge Info (List): Conference:%s - Parties:%s', conference, parties)
+                num = parties
                 event = 'List'
 
             case _:
                 event = ''
 
+        await self._dispatch_conference_status(event, num, conference, channel)
+
+    async def _dispatch_conference_status(self, event: str, num: str, conference: str, channel: str):
         for callback in self._on_conference_status_changed_subscribers:
-            await callback(event, num, message.Conference, channel)
+            await callback(event, num, conference, channel)
 
-    async def _queue_status_changed(self, manager: Manager, message: Message):
-        self._logger.info('Queue Event')
-        self._logger.info(f' Queue ------ : {message}')
-        match message.Event:
+    async def _queue_status_changed(self, event_name: str, caller: str, channel: str, position: str, hold_time: str,
+                                    interface: str, status: str):
+        self._logger.info('Queue Event %s', event_name)
+        match event_name:
             case 'QueueCallerJoin':
-                # channel = get_channel_extension(message.Channel)
-                self._logger.critical('* New Caller (Queue): Extension %s in Position: %s ',
-                                      message.CallerIDNum, message.Position)
-                await self._queue_caller_status_changed(message.CallerIDNum, message.Channel, message.Position, 'Join')
+                self._logger.critical('* New Caller (Queue): Extension %s in Position: %s ', caller, position)
+                await self._queue_caller_status_changed(caller, channel, position, 'Join')
 
             case 'QueueCallerLeave':
-                channel = get_channel_extension(message.Channel)
-                self._logger.critical('* Caller Leave (Queue): Extension %s in Position: %s ',
-                                      message.CallerIDNum, message.Position)
-                await self._queue_caller_status_changed(message.CallerIDNum, message.Channel, message.Position, 'Leave')
+                self._logger.critical('* Caller Leave (Queue): Extension %s in Position: %s ', caller, position)
+                await self._queue_caller_status_changed(caller, channel, position, 'Leave')
 
             case 'QueueCallerAbandon':
-                channel = get_channel_extension(message.Channel)
                 self._logger.warning('* Caller Abandon (Queue): Extension %s in Position: %s HoldTime: %ss',
-                                     message.CallerIDNum, message.Position, message.HoldTime)
-                await self._queue_caller_status_changed(message.CallerIDNum, message.Channel, message.Position,
-                                                        'Abandon')
+                                     caller, position, hold_time)
+                await self._queue_caller_status_changed(caller, channel, position, 'Abandon')
 
             case 'QueueMemberStatus':
-                self._logger.info('* Operator Status (Queue): Operator %s Changed to %s',
-                                  message.Interface, message.Status)
-                event = 'MemberStatus'
-
-            case _:
-                event = ''
+                self._logger.info('* Operator Status (Queue): Operator %s Changed to %s', interface, status)
 
     async def _queue_caller_status_changed(self, caller: str, channel: str, position: str, state):
         match state: